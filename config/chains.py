@@ -48,6 +48,15 @@ class ChainConfig:
     # DEX router addresses
     dex_routers: dict[str, str] = field(default_factory=dict)
     
+    # Multicall3 at the canonical 0xcA11...CA11 address (batched DEX quotes)
+    has_multicall3: bool = True
+    
+    # WebSocket endpoints for newHeads subscriptions (DEX quotes refresh per block when set)
+    ws_endpoints: list[str] = field(default_factory=list)
+    
+    # RPC eth_call budget per second shared by everything quoting this chain
+    rpc_rps: int = 25
+    
     def get_rpc(self, index: int = 0) -> str:
         """Get RPC endpoint with rotation support, filtering None"""
         valid_rpcs = [r for r in self.rpc_endpoints if r is not None]
@@ -72,6 +81,10 @@ CHAINS: dict[ChainId, ChainConfig] = {
         ],
         explorer_url="https://etherscan.io",
         avg_block_time=12.0,
+        ws_endpoints=[
+            f"wss://mainnet.infura.io/ws/v3/{INFURA_KEY}" if INFURA_KEY else None,
+            "wss://ethereum-rpc.publicnode.com",
+        ],
         dex_routers={
             "uniswap_v2": "0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D",
             "uniswap_v3_quoter": "0x61fFE014bA17989E743c5F6cB21bF9697530B21e",
@@ -95,6 +108,7 @@ CHAINS: dict[ChainId, ChainConfig] = {
         ],
         explorer_url="https://bscscan.com",
         avg_block_time=3.0,
+        ws_endpoints=["wss://bsc-rpc.publicnode.com"],
         dex_routers={
             "pancakeswap_v2": "0x10ED43C718714eb63d5aA57B78B54704E256024E",
             "pancakeswap_v3_quoter": "0xB048Bbc1Ee6b733FFfCFb9e9CeF7375518e25997",
@@ -117,6 +131,7 @@ CHAINS: dict[ChainId, ChainConfig] = {
         ],
         explorer_url="https://polygonscan.com",
         avg_block_time=2.0,
+        ws_endpoints=["wss://polygon-bor-rpc.publicnode.com"],
         dex_routers={
             "quickswap": "0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff",
             "sushiswap": "0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506",
@@ -160,6 +175,7 @@ CHAINS: dict[ChainId, ChainConfig] = {
         ],
         explorer_url="https://optimistic.etherscan.io",
         avg_block_time=2.0,
+        ws_endpoints=["wss://optimism-rpc.publicnode.com"],
         dex_routers={
             "velodrome": "0xa062aE8A9c5e11aaA026fc2670B0D65cCc8B2858",
             "uniswap_v3_quoter": "0x61fFE014bA17989E743c5F6cB21bF9697530B21e",
@@ -219,6 +235,7 @@ CHAINS: dict[ChainId, ChainConfig] = {
         ],
         explorer_url="https://basescan.org",
         avg_block_time=2.0,
+        ws_endpoints=["wss://base-rpc.publicnode.com"],
         dex_routers={
             "aerodrome": "0xcF77a3Ba9A5CA399B7c97c74d54e5b1Beb874E43",
             "baseswap": "0x327Df1E6de05895d2ab08513aaDD9313Fe505d86",
@@ -241,7 +258,8 @@ CHAINS: dict[ChainId, ChainConfig] = {
         dex_routers={
             "syncswap": "0x2da10A1e27bF85cEdD8FFb1AbBe97e53391C0295",
             "mute": "0x8B791913eB07C32779a16750e3868aA8495F5964",
-        }
+        },
+        has_multicall3=False,  # zkSync deploys Multicall3 at a non-canonical address
     ),
     
     ChainId.LINEA: ChainConfig(
@@ -13,6 +13,7 @@ class ExchangeConfig:
     name: str
     rate_limit_per_second: float
     supports_public_api: bool = True
+    ws_shards: int = 3  # Max parallel WS connections for ticker streams
 
 
 # Centralized exchanges to monitor (all support public API without keys)
@@ -20,7 +21,7 @@ EXCHANGES: list[ExchangeConfig] = [
     # Tier 1 - Major Exchanges
     ExchangeConfig(id="binance", name="Binance", rate_limit_per_second=20.0),
     ExchangeConfig(id="coinbase", name="Coinbase", rate_limit_per_second=10.0),
-    ExchangeConfig(id="kraken", name="Kraken", rate_limit_per_second=1.0),
+    ExchangeConfig(id="kraken", name="Kraken", rate_limit_per_second=1.0, ws_shards=1),
     ExchangeConfig(id="kucoin", name="KuCoin", rate_limit_per_second=10.0),
     ExchangeConfig(id="bybit", name="Bybit", rate_limit_per_second=2.0),
     ExchangeConfig(id="okx", name="OKX", rate_limit_per_second=10.0),
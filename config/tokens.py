@@ -2,8 +2,10 @@
 Token configurations per chain
 Expanded to 50+ tokens with addresses across all chains
 """
+import sys
 from dataclasses import dataclass, field
 from config.chains import ChainId
+from utils.addresses import ADDRESS_RE, checksum_address
 
 
 @dataclass
@@ -16,6 +18,14 @@ class Token:
     chain_decimals: dict[ChainId, int] = field(default_factory=dict)  # Overrides per chain
     approx_price_usd: float = 1.0  # Approximate price for trade sizing
     
+    def __post_init__(self):
+        # Checksum once here so adapters can pass addresses straight through.
+        # Malformed entries are kept raw so validate_config.py can report them instead of the import failing.
+        self.addresses = {
+            chain_id: checksum_address(address) if ADDRESS_RE.match(address) else address
+            for chain_id, address in self.addresses.items()
+        }
+    
     def get_address(self, chain_id: ChainId) -> str | None:
         """Get token address for a specific chain"""
         return self.addresses.get(chain_id)
@@ -851,6 +861,47 @@ def get_tokens_for_chain(chain_id: ChainId) -> list[Token]:
     return [t for t in ALL_TOKENS if chain_id in t.addresses]
 
 
+# chain -> address -> symbol; first token in ALL_TOKENS wins on duplicates.
+# Keyed by both the checksummed form (what the DEX adapters pass, no .lower() needed) and lowercase.
+# Checksummed keys are the interned strings checksum_address returns, so hot-path hits compare by identity.
+_SYMBOL_INDEX: dict[ChainId, dict[str, str]] = {}
+for _token in ALL_TOKENS:
+    for _chain_id, _address in _token.addresses.items():
+        _index = _SYMBOL_INDEX.setdefault(_chain_id, {})
+        _index.setdefault(_address, _token.symbol)
+        _index.setdefault(sys.intern(_address.lower()), _token.symbol)
+del _token, _chain_id, _address, _index
+
+
+def get_token_symbol(chain_id: ChainId, address: str) -> str:
+    """Symbol for a token address on a chain, or a shortened address if unknown"""
+    index = _SYMBOL_INDEX.get(chain_id)
+    if index is None:
+        return address[:8] + "..."
+    return index.get(address) or index.get(address.lower()) or address[:8] + "..."
+
+
 def normalize_symbol(symbol: str) -> str:
     """Normalize wrapped token symbols to their base form for CEX comparison"""
     return CEX_SYMBOL_MAP.get(symbol, symbol)
+
+
+# Precomputed (base, quote, "BASE/QUOTE") for TRADING_PAIRS, normalized for CEX comparison
+NORMALIZED_TRADING_PAIRS: list[tuple[str, str, str]] = [
+    (base, quote, sys.intern(f"{normalize_symbol(base)}/{normalize_symbol(quote)}"))
+    for base, quote in TRADING_PAIRS
+]
+
+# (base, quote) -> normalized "BASE/QUOTE"; extended lazily for pairs outside TRADING_PAIRS
+_NORMALIZED_PAIR_CACHE: dict[tuple[str, str], str] = {
+    (base, quote): norm_symbol for base, quote, norm_symbol in NORMALIZED_TRADING_PAIRS
+}
+
+
+def normalize_pair(base: str, quote: str) -> str:
+    """Get the normalized "BASE/QUOTE" symbol for a pair (cached, interned)"""
+    norm_symbol = _NORMALIZED_PAIR_CACHE.get((base, quote))
+    if norm_symbol is None:
+        norm_symbol = sys.intern(f"{normalize_symbol(base)}/{normalize_symbol(quote)}")
+        _NORMALIZED_PAIR_CACHE[(base, quote)] = norm_symbol
+    return norm_symbol
@@ -3,20 +3,22 @@ Arbitrage Detection Engine
 Finds profitable arbitrage opportunities across CEXs and DEXs
 """
 import asyncio
+import numpy as np
 from dataclasses import dataclass, field
 from typing import Optional
 from datetime import datetime
 
 from config.chains import ChainId
-from config.tokens import TRADING_PAIRS, normalize_symbol, ALL_TOKENS
+from config.tokens import TRADING_PAIRS, normalize_pair, ALL_TOKENS
 from config.settings import MIN_PROFIT_USD, DEFAULT_TRADE_SIZE_USD, get_profit_level, ProfitLevel
 from exchanges.cex.ccxt_fetcher import cex_fetcher, CEXPrice
 from exchanges.cex.ws_fetcher import ws_fetcher
-from exchanges.dex.aggregator import dex_aggregator, DEXQuote
+from exchanges.dex.aggregator import dex_aggregator, DEXQuoteBatch
 from core.gas_estimator import gas_estimator, GasEstimate
 from core.strategies.triangular import triangular_strategy
 from config.fees import get_withdrawal_fee
 from utils.logger import get_logger
+from utils.rpc_manager import rpc_manager
 
 logger = get_logger(__name__)
 
@@ -89,6 +91,9 @@ class ArbitrageEngine:
         """Initialize all price fetchers"""
         logger.info("[bold blue]Initializing Arbitrage Engine...[/bold blue]")
         
+        # Warm RPC connections while the CEX side initializes
+        rpc_warmup = asyncio.create_task(rpc_manager.prewarm())
+        
         # Initialize CEX fetcher (REST)
         await cex_fetcher.initialize()
         
@@ -100,11 +105,12 @@ class ArbitrageEngine:
         
         # Initialize WS fetcher (Real-time) with discovered symbols
         await ws_fetcher.initialize()
-        ws_symbols = [f"{normalize_symbol(b)}/{normalize_symbol(q)}" for b, q in self._discovered_pairs]
+        ws_symbols = [normalize_pair(b, q) for b, q in self._discovered_pairs]
         # Only watch top 500 pairs via WS to avoid overwhelming connections
         await ws_fetcher.start(ws_symbols[:500])
         
         # Initialize DEX aggregator
+        await rpc_warmup
         await dex_aggregator.initialize()
         
         # Get initial gas estimates
@@ -158,7 +164,7 @@ class ArbitrageEngine:
     def _build_price_matrix(
         self,
         cex_prices: dict[str, list[CEXPrice]],
-        dex_prices: dict[str, list[DEXQuote]]
+        dex_prices: dict[str, DEXQuoteBatch]
     ) -> dict[str, list[PriceSource]]:
         """Build unified price matrix from all sources"""
         matrix: dict[str, list[PriceSource]] = {}
@@ -190,28 +196,29 @@ class ArbitrageEngine:
                     volume_24h=price.volume_24h
                 ))
         
-        # Add DEX prices
-        for symbol, quotes in dex_prices.items():
+        # Add DEX prices (columnar: filter and apply fees per pair in one pass)
+        for symbol, batch in dex_prices.items():
             if symbol not in matrix:
                 matrix[symbol] = []
             
-            for quote in quotes:
-                # RELIABILITY CHECK: Stale Data (< 10s)
-                if quote.timestamp > 0:
-                    age = now - quote.timestamp
-                    if age > 10:
-                        continue
-                
-                # Apply fee to bid/ask
-                bid = quote.bid * (1 - quote.fee_percent / 100)
-                ask = quote.ask * (1 + quote.fee_percent / 100)
-                
+            # RELIABILITY CHECK: Stale Data (< 10s); timestamp 0 means unknown age
+            ts = batch.timestamp
+            fresh = (ts <= 0) | (now - ts <= 10)
+            
+            # Apply fee to bid/ask
+            fee = batch.fee_percent / 100
+            bids = (batch.bid * (1 - fee)).tolist()
+            asks = (batch.ask * (1 + fee)).tolist()
+            
+            quotes = batch.quotes
+            for k in np.flatnonzero(fresh).tolist():
+                quote = quotes[k]
                 matrix[symbol].append(PriceSource(
                     source_type="DEX",
                     source_name=quote.dex_name,
                     chain=quote.chain,
-                    bid=bid,
-                    ask=ask,
+                    bid=bids[k],
+                    ask=asks[k],
                     timestamp=quote.timestamp
                 ))
         
@@ -409,7 +416,7 @@ class ArbitrageEngine:
         # Optimization: Fetch DEX only for pairs that have Token mappings
         # To avoid giant multicalls for assets we don't have addresses for
         dex_pairs = []
-        from config.tokens import ALL_TOKENS, normalize_symbol
+        from config.tokens import ALL_TOKENS
         # Build token symbol map for speed
         token_map = {t.symbol: t for t in ALL_TOKENS}
         
@@ -427,25 +434,33 @@ class ArbitrageEngine:
         )
         
         # 4. MERGE WS PRICES
+        # One snapshot of the WS matrices; NaN marks symbols without a tick yet
+        ws_bids, ws_asks = ws_fetcher.snapshot()
+        ws_ts = ws_fetcher.timestamps()
+        ws_mids = (ws_bids + ws_asks) * 0.5
+        ws_valid = np.isfinite(ws_mids) & (ws_bids > 0)
+        ws_cols = ws_fetcher.symbols
+        ws_rows = ws_fetcher.exchange_rows
+        
         for exchange_id in ws_active_exchanges:
-            for base, quote in self._discovered_pairs:
-                norm_symbol = f"{normalize_symbol(base)}/{normalize_symbol(quote)}"
-                ws_price = ws_fetcher.get_latest_price(exchange_id, norm_symbol)
+            row = ws_rows.get(exchange_id)
+            if row is None:
+                continue
+            for col in np.flatnonzero(ws_valid[row]):
+                norm_symbol = ws_cols[col]
+                cex_p = CEXPrice(
+                    exchange=exchange_id,
+                    symbol=norm_symbol,
+                    bid=float(ws_bids[row, col]),
+                    ask=float(ws_asks[row, col]),
+                    mid=float(ws_mids[row, col]),
+                    timestamp=int(ws_ts[row, col] * 1000),
+                    volume_24h=None
+                )
                 
-                if ws_price and ws_price.bid > 0:
-                    cex_p = CEXPrice(
-                        exchange=exchange_id,
-                        symbol=norm_symbol,
-                        bid=ws_price.bid,
-                        ask=ws_price.ask,
-                        mid=(ws_price.bid + ws_price.ask) / 2,
-                        timestamp=int(ws_price.timestamp * 1000),
-                        volume_24h=None
-                    )
-                    
-                    if norm_symbol not in cex_prices:
-                        cex_prices[norm_symbol] = []
-                    cex_prices[norm_symbol].append(cex_p)
+                if norm_symbol not in cex_prices:
+                    cex_prices[norm_symbol] = []
+                cex_prices[norm_symbol].append(cex_p)
         
         self._gas_estimates = gas_estimates
         
@@ -22,6 +22,9 @@ GAS_ESTIMATES = {
     "transfer": 21_000,
 }
 
+# Per-chain timeout for a single gas estimate (seconds)
+GAS_ESTIMATE_TIMEOUT = 5.0
+
 
 @dataclass
 class GasEstimate:
@@ -147,25 +150,34 @@ class GasEstimator:
             logger.debug(f"Failed to estimate gas for {chain_id.name}: {e}")
             return None
     
+    async def _get_gas_estimate_with_timeout(
+        self,
+        chain_id: ChainId,
+        timeout: float = GAS_ESTIMATE_TIMEOUT
+    ) -> Optional[GasEstimate]:
+        """Get gas estimate for a chain, giving up after `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self.get_gas_estimate(chain_id), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.debug(f"Gas estimation timed out for {chain_id.name}")
+        except Exception as e:
+            logger.debug(f"Gas estimation failed for {chain_id.name}: {e}")
+        return None
+    
     async def get_all_gas_estimates(self) -> dict[ChainId, GasEstimate]:
         """Get gas estimates for all chains"""
         # First update native prices
         await self.update_native_prices()
         
         results = {}
-        tasks = [(chain_id, self.get_gas_estimate(chain_id)) for chain_id in CHAINS.keys()]
+        chain_ids = list(CHAINS.keys())
         
-        # Add a total timeout for gas estimation
-        try:
-            estimates = await asyncio.wait_for(
-                asyncio.gather(*[t[1] for t in tasks], return_exceptions=True),
-                timeout=30.0
-            )
-        except asyncio.TimeoutError:
-            print("  - Gas estimation timed out, using partial results.", flush=True)
-            estimates = [None] * len(tasks)
+        # Per-chain timeout so one stuck RPC doesn't discard every other chain's estimate
+        estimates = await asyncio.gather(
+            *[self._get_gas_estimate_with_timeout(chain_id) for chain_id in chain_ids]
+        )
         
-        for (chain_id, _), estimate in zip(tasks, estimates):
+        for chain_id, estimate in zip(chain_ids, estimates):
             if isinstance(estimate, GasEstimate):
                 results[chain_id] = estimate
             elif chain_id in self._gas_estimates:
@@ -0,0 +1,178 @@
+"""
+JSON-RPC Batching Provider
+Coalesces eth_calls (and gas price / block number reads) issued within a few
+milliseconds of each other into one HTTP POST carrying a JSON-RPC batch array.
+Complements Multicall3 for calls that can't be aggregated on-chain (chains
+without Multicall3, per-call fallbacks).
+
+Request/response bodies go through orjson when it's installed.
+"""
+import asyncio
+import itertools
+import json
+from typing import Any
+import aiohttp
+from web3 import AsyncHTTPProvider
+from web3._utils.encoding import Web3JsonEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; web3's stdlib json path is used instead
+    orjson = None
+
+# Only plain reads are coalesced; everything else goes through the normal path
+BATCHABLE_METHODS = frozenset({"eth_call", "eth_gasPrice", "eth_blockNumber"})
+BATCH_WINDOW = 0.003  # Seconds to wait for more requests before flushing
+MAX_BATCH_SIZE = 20  # Public RPCs commonly reject larger batch arrays
+
+
+class AsyncBatchingHTTPProvider(AsyncHTTPProvider):
+    """
+    AsyncHTTPProvider that debounces eth_calls into JSON-RPC batch requests.
+    Responses are matched back to their callers by id.
+    """
+
+    def __init__(
+        self,
+        endpoint_uri: str,
+        session: aiohttp.ClientSession,
+        timeout: float = 15,
+        connect_timeout: float = 2,
+        **kwargs
+    ):
+        # The transport owns per-request deadlines, so callers need no asyncio.wait_for of their own
+        self._timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        super().__init__(endpoint_uri, request_kwargs={"timeout": self._timeout}, **kwargs)
+        self._session = session
+        self._ids = itertools.count(1)
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # Cleared the first time the endpoint answers a batch with a non-array
+        self._batch_supported = True
+        # web3 validates eth_chainId ahead of every eth_call; the answer never changes
+        self._chain_id_response: asyncio.Future | None = None
+        # Batch POSTs in flight; the loop only holds tasks weakly
+        self._send_tasks: set[asyncio.Task] = set()
+
+    def encode_rpc_request(self, method, params: Any) -> bytes:
+        if orjson is None:
+            return super().encode_rpc_request(method, params)
+        try:
+            return orjson.dumps({"jsonrpc": "2.0", "method": method, "params": params or [], "id": next(self._ids)})
+        except TypeError:
+            # Types only web3's encoder knows (HexBytes, AttributeDict, ...)
+            return super().encode_rpc_request(method, params)
+
+    @staticmethod
+    def decode_rpc_response(raw_response: bytes):
+        if orjson is None:
+            return AsyncHTTPProvider.decode_rpc_response(raw_response)
+        return orjson.loads(raw_response)
+
+    async def make_request(self, method, params: Any):
+        if method == "eth_chainId":
+            # Concurrent first callers share one in-flight request
+            if self._chain_id_response is None:
+                self._chain_id_response = asyncio.ensure_future(super().make_request(method, params))
+            chain_id_response = self._chain_id_response
+            try:
+                response = await asyncio.shield(chain_id_response)
+            except Exception:
+                if self._chain_id_response is chain_id_response:
+                    self._chain_id_response = None
+                raise
+            if "result" not in response and self._chain_id_response is chain_id_response:
+                self._chain_id_response = None
+            return response
+
+        if method not in BATCHABLE_METHODS or not self._batch_supported:
+            return await super().make_request(method, params)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request = {"jsonrpc": "2.0", "method": method, "params": params, "id": next(self._ids)}
+        self._pending.append((request, future))
+
+        if len(self._pending) >= MAX_BATCH_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(BATCH_WINDOW, self._flush)
+        return await future
+
+    def _flush(self):
+        """Hand the pending requests to a POST task and start a new window"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.create_task(self._send_batch(pending))
+            self._send_tasks.add(task)
+            task.add_done_callback(self._send_tasks.discard)
+
+    async def _send_batch(self, pending: list[tuple[dict, asyncio.Future]]):
+        """POST one batch and resolve each caller's future with its own response"""
+        if len(pending) == 1:
+            # Nothing to coalesce; skip the array wrapper
+            request, future = pending[0]
+            await self._resolve_single(request, future)
+            return
+
+        try:
+            body = self._encode_batch([request for request, _ in pending])
+        except (TypeError, ValueError):
+            # Params even web3's encoder rejects: let each call succeed or fail on its own
+            await asyncio.gather(*(self._resolve_single(request, future) for request, future in pending))
+            return
+
+        try:
+            async with self._session.post(
+                self.endpoint_uri,
+                data=body,
+                headers=self.get_request_headers(),
+                timeout=self._timeout
+            ) as resp:
+                resp.raise_for_status()
+                responses = self.decode_rpc_response(await resp.read())
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if not isinstance(responses, list):
+            # Endpoint doesn't do batches: fall back to one request per call from now on
+            self._batch_supported = False
+            await asyncio.gather(*(self._resolve_single(request, future) for request, future in pending))
+            return
+
+        by_id = {response.get("id"): response for response in responses}
+        for request, future in pending:
+            if future.done():
+                continue
+            response = by_id.get(request["id"])
+            if response is None:
+                future.set_exception(aiohttp.ClientPayloadError(
+                    f"No response for request id {request['id']} in batch"
+                ))
+            else:
+                future.set_result(response)
+
+    def _encode_batch(self, requests: list[dict]) -> bytes:
+        if orjson is not None:
+            try:
+                return orjson.dumps(requests)
+            except TypeError:
+                pass
+        # Same encoder web3 uses for single requests (HexBytes, AttributeDict, ...)
+        return json.dumps(requests, cls=Web3JsonEncoder).encode()
+
+    async def _resolve_single(self, request: dict, future: asyncio.Future):
+        """Send one request through the regular provider path"""
+        if future.done():
+            return
+        try:
+            future.set_result(await super().make_request(request["method"], request["params"]))
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
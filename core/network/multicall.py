@@ -6,40 +6,16 @@ Contract Address (All Chains): 0xcA11bde05977b3631167028862bE2a173976CA11
 import asyncio
 from typing import NamedTuple, Any
 from web3 import AsyncWeb3
-from eth_abi import decode
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector
+from utils.addresses import checksum_address
 
 MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
 
-MULTICALL3_ABI = [
-    {
-        "inputs": [
-            {
-                "components": [
-                    {"internalType": "address", "name": "target", "type": "address"},
-                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
-                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
-                ],
-                "internalType": "struct Multicall3.Call3[]",
-                "name": "calls",
-                "type": "tuple[]"
-            }
-        ],
-        "name": "aggregate3",
-        "outputs": [
-            {
-                "components": [
-                    {"internalType": "bool", "name": "success", "type": "bool"},
-                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
-                ],
-                "internalType": "struct Multicall3.Result[]",
-                "name": "returnData",
-                "type": "tuple[]"
-            }
-        ],
-        "stateMutability": "view",
-        "type": "function"
-    }
-]
+# aggregate3((address,bool,bytes)[]) selector and ABI types
+AGGREGATE3_SELECTOR = function_signature_to_4byte_selector("aggregate3((address,bool,bytes)[])")
+AGGREGATE3_INPUT_TYPES = ["(address,bool,bytes)[]"]
+AGGREGATE3_OUTPUT_TYPES = ["(bool,bytes)[]"]
 
 class Call(NamedTuple):
     target: str
@@ -47,50 +23,63 @@ class Call(NamedTuple):
     call_data: bytes
     output_types: list[str]  # e.g. ['uint256', 'uint256']
 
+class EncodedBatch(NamedTuple):
+    """
+    A pre-encoded aggregate3 request.
+    Build once with Multicall.prepare() and re-execute every tick;
+    only rebuild when the set of calls changes.
+    """
+    payload: bytes  # aggregate3 selector + ABI-encoded Call3[]
+    output_types: tuple[list[str], ...]  # Per-call output types, same order as calls
+
 class Multicall:
     def __init__(self, web3: AsyncWeb3):
         self.web3 = web3
-        self.contract = web3.eth.contract(
-            address=MULTICALL3_ADDRESS,
-            abi=MULTICALL3_ABI
-        )
 
-    async def aggregate(self, calls: list[Call]) -> list[Any]:
+    def prepare(self, calls: list[Call]) -> EncodedBatch:
         """
-        Execute multiple calls in a single RPC request.
-        Returns a list of decoded results. If a call failed (and allow_failure=True), 
-        the result will be None.
+        Encode calls into an aggregate3 payload.
+        Does NOT execute network request.
         """
-        if not calls:
-            return []
-
-        # Prepare input data
         call_structs = [
             (
-                self.web3.to_checksum_address(call.target),
+                checksum_address(call.target),
                 call.allow_failure,
                 call.call_data
             )
             for call in calls
         ]
+        payload = AGGREGATE3_SELECTOR + encode(AGGREGATE3_INPUT_TYPES, [call_structs])
+        return EncodedBatch(
+            payload=payload,
+            output_types=tuple(call.output_types for call in calls)
+        )
+
+    async def execute(self, batch: EncodedBatch) -> list[Any]:
+        """
+        Execute a prepared batch with a single raw eth_call.
+        Returns a list of decoded results. If a call failed (and allow_failure=True), 
+        the result will be None.
+        """
+        if not batch.output_types:
+            return []
 
-        # Execute aggregate3
-        try:
-            results = await self.contract.functions.aggregate3(call_structs).call()
-        except Exception as e:
-            # Fallback or specific error handling could go here
-            # For now, re-raise to handle upstream
-            raise e
+        # Execute aggregate3; errors propagate to be handled upstream
+        raw = await self.web3.eth.call({
+            "to": MULTICALL3_ADDRESS,
+            "data": batch.payload
+        })
+        (results,) = decode(AGGREGATE3_OUTPUT_TYPES, bytes(raw))
 
         decoded_results = []
-        for i, (success, return_data) in enumerate(results):
+        for output_types, (success, return_data) in zip(batch.output_types, results):
             if not success or not return_data:
                 decoded_results.append(None)
                 continue
             
             try:
                 # Decode the result bytes
-                decoded = decode(calls[i].output_types, return_data)
+                decoded = decode(output_types, return_data)
                 # Unwrap single values
                 if len(decoded) == 1:
                     decoded_results.append(decoded[0])
@@ -100,3 +89,14 @@ class Multicall:
                 decoded_results.append(None)
 
         return decoded_results
+
+    async def aggregate(self, calls: list[Call]) -> list[Any]:
+        """
+        Execute multiple calls in a single RPC request.
+        Returns a list of decoded results. If a call failed (and allow_failure=True), 
+        the result will be None.
+        """
+        if not calls:
+            return []
+
+        return await self.execute(self.prepare(calls))
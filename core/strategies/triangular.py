@@ -24,6 +24,21 @@ class TriangularStrategy:
     """
     def __init__(self):
         self.min_profit_pct = 0.1 # 0.1% minimum
+        # symbol -> (base, quote), or None if not a BASE/QUOTE symbol
+        self._parsed_symbols: dict[str, Optional[tuple[str, str]]] = {}
+    
+    def _parse_symbol(self, symbol: str) -> Optional[tuple[str, str]]:
+        """Split "BASE/QUOTE" once and remember the result"""
+        try:
+            return self._parsed_symbols[symbol]
+        except KeyError:
+            pass
+        parsed = None
+        if '/' in symbol:
+            base, quote = symbol.split('/', 1)
+            parsed = (base, quote)
+        self._parsed_symbols[symbol] = parsed
+        return parsed
         
     def find_opportunities(self, cex_prices: dict[str, list[CEXPrice]]) -> list[TriangularOpportunity]:
         """
@@ -47,71 +62,79 @@ class TriangularStrategy:
             # Find possible triangles
             # We look for: BASE/HUB1, HUB1/HUB2, BASE/HUB2
             
-            # Extract all bases
-            symbols = list(markets.keys())
-            bases = set()
-            for s in symbols:
-                if '/' in s:
-                    bases.add(s.split('/')[0])
+            # Group once by quote: quote -> {base -> (symbol, price)}
+            by_quote: dict[str, dict[str, tuple[str, CEXPrice]]] = {}
+            for symbol, price in markets.items():
+                parsed = self._parse_symbol(symbol)
+                if parsed is None:
+                    continue
+                base, quote = parsed
+                if quote not in by_quote:
+                    by_quote[quote] = {}
+                by_quote[quote][base] = (symbol, price)
             
-            for base in bases:
-                if base in HUBS: continue
-                
-                for i in range(len(HUBS)):
-                    for j in range(i + 1, len(HUBS)):
-                        h1 = HUBS[i]
-                        h2 = HUBS[j]
+            for i in range(len(HUBS)):
+                for j in range(i + 1, len(HUBS)):
+                    h1 = HUBS[i]
+                    h2 = HUBS[j]
+                    
+                    quoted_h1 = by_quote.get(h1)
+                    quoted_h2 = by_quote.get(h2)
+                    if not quoted_h1 or not quoted_h2 or h1 not in quoted_h2:
+                        continue
+                    
+                    # Bridge market h1/h2
+                    p2_sym, m2 = quoted_h2[h1]
+                    
+                    for base, (p1_sym, m1) in quoted_h1.items():
+                        if base in HUBS: continue
                         
                         # Possible Triple: (base/h1, h1/h2, base/h2)
-                        p1_sym = f"{base}/{h1}"
-                        p2_sym = f"{h1}/{h2}"
-                        p3_sym = f"{base}/{h2}"
+                        leg3 = quoted_h2.get(base)
+                        if leg3 is None:
+                            continue
+                        p3_sym, m3 = leg3
                         
-                        if p1_sym in markets and p2_sym in markets and p3_sym in markets:
-                            # Path: base -> h1 -> h2 -> base
-                            # Trade 1: base -> h1 (SELL base/h1) -> amount_h1 = 1 * bid(base/h1)
-                            # Trade 2: h1 -> h2 (BUY h1/h2) -> amount_h2 = amount_h1 / ask(h1/h2)
-                            # Trade 3: h2 -> base (BUY base/h2) -> amount_base = amount_h2 / ask(base/h2)
-                            
-                            m1 = markets[p1_sym]
-                            m2 = markets[p2_sym]
-                            m3 = markets[p3_sym]
+                        # Path: base -> h1 -> h2 -> base
+                        # Trade 1: base -> h1 (SELL base/h1) -> amount_h1 = 1 * bid(base/h1)
+                        # Trade 2: h1 -> h2 (BUY h1/h2) -> amount_h2 = amount_h1 / ask(h1/h2)
+                        # Trade 3: h2 -> base (BUY base/h2) -> amount_base = amount_h2 / ask(base/h2)
+                        
+                        # Forward: base -> h1 -> h2 -> base
+                        try:
+                            # Start with 1 unit of BASE
+                            res1 = m1.bid # SELL base for h1
+                            res2 = res1 / m2.ask # BUY h2 with h1
+                            res3 = res2 / m3.ask # BUY base with h2
                             
-                            # Forward: base -> h1 -> h2 -> base
-                            try:
-                                # Start with 1 unit of BASE
-                                res1 = m1.bid # SELL base for h1
-                                res2 = res1 / m2.ask # BUY h2 with h1
-                                res3 = res2 / m3.ask # BUY base with h2
-                                
-                                profit = (res3 - 1.0) * 100
-                                if profit > self.min_profit_pct:
-                                    results.append(TriangularOpportunity(
-                                        exchange=exchange,
-                                        symbol_path=[p1_sym, p2_sym, p3_sym],
-                                        trade_path=["SELL", "BUY", "BUY"],
-                                        expected_profit_pct=profit
-                                    ))
-                                    
-                                # Reverse: base -> h2 -> h1 -> base
-                                # Trade 1: base -> h2 (SELL base/h2) -> amount_h2 = 1 * bid(base/h2)
-                                # Trade 2: h2 -> h1 (SELL h1/h2 is h2 for h1) -> amount_h1 = amount_h2 * bid(h1/h2)
-                                # Trade 3: h1 -> base (BUY base/h1) -> amount_base = amount_h1 / ask(base/h1)
+                            profit = (res3 - 1.0) * 100
+                            if profit > self.min_profit_pct:
+                                results.append(TriangularOpportunity(
+                                    exchange=exchange,
+                                    symbol_path=[p1_sym, p2_sym, p3_sym],
+                                    trade_path=["SELL", "BUY", "BUY"],
+                                    expected_profit_pct=profit
+                                ))
                                 
-                                r_res1 = m3.bid
-                                r_res2 = r_res1 * m2.bid
-                                r_res3 = r_res2 / m1.ask
-                                
-                                r_profit = (r_res3 - 1.0) * 100
-                                if r_profit > self.min_profit_pct:
-                                    results.append(TriangularOpportunity(
-                                        exchange=exchange,
-                                        symbol_path=[p3_sym, p2_sym, p1_sym],
-                                        trade_path=["SELL", "SELL", "BUY"],
-                                        expected_profit_pct=r_profit
-                                    ))
-                            except:
-                                continue
+                            # Reverse: base -> h2 -> h1 -> base
+                            # Trade 1: base -> h2 (SELL base/h2) -> amount_h2 = 1 * bid(base/h2)
+                            # Trade 2: h2 -> h1 (SELL h1/h2 is h2 for h1) -> amount_h1 = amount_h2 * bid(h1/h2)
+                            # Trade 3: h1 -> base (BUY base/h1) -> amount_base = amount_h1 / ask(base/h1)
+                            
+                            r_res1 = m3.bid
+                            r_res2 = r_res1 * m2.bid
+                            r_res3 = r_res2 / m1.ask
+                            
+                            r_profit = (r_res3 - 1.0) * 100
+                            if r_profit > self.min_profit_pct:
+                                results.append(TriangularOpportunity(
+                                    exchange=exchange,
+                                    symbol_path=[p3_sym, p2_sym, p1_sym],
+                                    trade_path=["SELL", "SELL", "BUY"],
+                                    expected_profit_pct=r_profit
+                                ))
+                        except:
+                            continue
                                 
         return results
 
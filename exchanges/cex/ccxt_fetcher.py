@@ -3,21 +3,48 @@ CCXT-based centralized exchange price fetcher
 Fetches prices from multiple CEXs using public APIs (no API key required)
 """
 import asyncio
+import json
 import time
+from pathlib import Path
 from dataclasses import dataclass
 from typing import Optional
 import ccxt.async_support as ccxt
 
+try:
+    import orjson
+except ImportError:  # Optional speedup for the markets cache; stdlib json otherwise
+    orjson = None
+
 from config.exchanges import EXCHANGES, ExchangeConfig
-from config.tokens import TRADING_PAIRS, normalize_symbol
+from config.tokens import NORMALIZED_TRADING_PAIRS, normalize_symbol, normalize_pair
 from utils.rate_limiter import rate_limiter
 from utils.logger import get_logger
 from utils.rpc_manager import get_global_session
 
 logger = get_logger(__name__)
 
+# Sentinel for symbol cache misses (None is a valid cached result)
+_MISSING = object()
+
+# Market load timeout, and delay before the single background retry on init failure
+MARKET_LOAD_TIMEOUT = 15.0
+INIT_RETRY_DELAY = 5.0
+
+# Candidate symbol layouts, probed once per exchange against reference pairs
+_SYMBOL_FORMATS = (
+    lambda b, q: f"{b}/{q}",
+    lambda b, q: f"{b}-{q}",
+    lambda b, q: f"{b}{q}",
+    lambda b, q: f"{b}_{q}",
+)
+_SYMBOL_PROBE_PAIRS = (("BTC", "USDT"), ("ETH", "USDT"), ("BTC", "USD"))
+
+# On-disk markets snapshots; a fresh one lets init skip load_markets() (refreshed in background)
+MARKETS_CACHE_DIR = Path("markets_cache")
+MARKETS_CACHE_MAX_AGE = 24 * 3600
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class CEXPrice:
     """Price data from a CEX"""
     exchange: str
@@ -44,8 +71,17 @@ class CCXTFetcher:
     
     def __init__(self):
         self._exchanges: dict[str, ccxt.Exchange] = {}
+        # (exchange_id, base, quote) -> exchange symbol or None; valid until markets reload
+        self._symbol_cache: dict[tuple[str, str, str], Optional[str]] = {}
+        # Pair list the plans below were built for (None = TRADING_PAIRS)
+        self._planned_pairs: Optional[list[tuple[str, str]]] = None
+        self._normalized_pairs: list[tuple[str, str, str]] = NORMALIZED_TRADING_PAIRS
+        # exchange_id -> (exchange_symbols, exchange_symbol -> normalized_symbol)
+        self._exchange_pair_plans: dict[str, tuple[list[str], dict[str, str]]] = {}
         self._initialized = False
         self._init_semaphore = asyncio.Semaphore(10)  # Moderate concurrency for faster startup
+        self._background_tasks: set[asyncio.Task] = set()  # Init retries / market refreshes still pending
+        self._batch_semaphore = asyncio.Semaphore(8)  # Bound concurrent ticker batches per poll
     
     async def initialize(self):
         """Initialize all configured exchanges in parallel"""
@@ -56,14 +92,15 @@ class CCXTFetcher:
         for config in EXCHANGES:
             tasks.append(self._init_exchange(config))
         
-        await asyncio.gather(*tasks)
+        await asyncio.gather(*tasks, return_exceptions=True)
         self._initialized = True
         logger.info(f"CEX Fetcher ready: {len(self._exchanges)} exchanges")
 
     async def _init_exchange(self, config: ExchangeConfig):
-        """Initialize a single exchange with timeout and cleanup"""
+        """Initialize a single exchange; on failure schedule one delayed retry"""
         exchange = None
         try:
+            async with self._init_semaphore:
                 session = await get_global_session()
                 exchange_class = getattr(ccxt, config.id)
                 exchange = exchange_class({
@@ -72,46 +109,179 @@ class CCXTFetcher:
                     'options': {'defaultType': 'spot'},
                     'session': session # Inject global session
                 })
-                
-                # Retry loop
-                for attempt in range(1, 4):
-                    try:
-                        # Load markets with timeout
-                        await asyncio.wait_for(exchange.load_markets(), timeout=15.0)
-                        self._exchanges[config.id] = exchange
-                        logger.info(f"✓ Initialized {config.name}")
-                        return # Success
-                    except Exception as attempt_err:
-                        if attempt == 3:
-                            raise attempt_err # Propagate on last attempt
-                        logger.debug(f"Retrying {config.name} (Attempt {attempt}/3)...")
-                        await asyncio.sleep(1.0 * attempt) # Backoff
-            
+                await self._load_and_register(config, exchange)
+        except Exception as e:
+            if exchange is None:
+                logger.warning(f"⚠ Failed to initialize {config.name}: {type(e).__name__} - {str(e)[:100]}...")
+                return
+            # Retry in the background instead of holding up startup
+            logger.debug(f"Retrying {config.name} in {INIT_RETRY_DELAY:.0f}s ({type(e).__name__})")
+            self._spawn(self._retry_init_exchange(config, exchange))
+    
+    async def _retry_init_exchange(self, config: ExchangeConfig, exchange: ccxt.Exchange):
+        """Second and last attempt at loading markets for an exchange"""
+        registered = False
+        try:
+            await asyncio.sleep(INIT_RETRY_DELAY)
+            async with self._init_semaphore:
+                await self._load_and_register(config, exchange)
+            registered = True
         except Exception as e:
-            error_type = type(e).__name__
-            logger.warning(f"⚠ Failed to initialize {config.name}: {error_type} - {str(e)[:100]}...")
-            if exchange:
+            logger.warning(f"⚠ Failed to initialize {config.name}: {type(e).__name__} - {str(e)[:100]}...")
+        finally:
+            # Also runs on cancellation (close()), which then propagates
+            if not registered:
                 try:
                     await exchange.close()
-                except:
+                except Exception:
                     pass
     
+    async def _load_and_register(self, config: ExchangeConfig, exchange: ccxt.Exchange):
+        """Load markets (disk cache first) and make the exchange available for fetching"""
+        if await asyncio.to_thread(self._load_cached_markets, config.id, exchange):
+            # Serve from the snapshot now, pick up new listings in the background
+            self._spawn(self.refresh_markets(config.id))
+        else:
+            await asyncio.wait_for(exchange.load_markets(), timeout=MARKET_LOAD_TIMEOUT)
+            await asyncio.to_thread(self._save_cached_markets, config.id, exchange)
+        self._index_markets(exchange)
+        exchange._has_fetch_tickers = bool(exchange.has.get('fetchTickers'))
+        exchange._rl_key = f"cex:{config.id}"
+        self._exchanges[config.id] = exchange
+        logger.info(f"✓ Initialized {config.name}")
+    
+    def _spawn(self, coro):
+        """Run a coroutine in the background, tracked so close() can cancel it"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    @staticmethod
+    def _load_cached_markets(exchange_id: str, exchange: ccxt.Exchange) -> bool:
+        """Populate markets from a fresh on-disk snapshot; False if missing, stale or unreadable"""
+        path = MARKETS_CACHE_DIR / f"{exchange_id}.json"
+        try:
+            if time.time() - path.stat().st_mtime > MARKETS_CACHE_MAX_AGE:
+                return False
+            raw = path.read_bytes()
+            data = orjson.loads(raw) if orjson else json.loads(raw)
+            exchange.set_markets(data['markets'], data.get('currencies'))
+            return True
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _save_cached_markets(exchange_id: str, exchange: ccxt.Exchange):
+        """Write the exchange's markets to disk for the next cold start"""
+        data = {'markets': exchange.markets, 'currencies': exchange.currencies}
+        try:
+            MARKETS_CACHE_DIR.mkdir(exist_ok=True)
+            path = MARKETS_CACHE_DIR / f"{exchange_id}.json"
+            tmp = path.with_suffix(".tmp")
+            if orjson:
+                tmp.write_bytes(orjson.dumps(data, default=str))
+            else:
+                tmp.write_text(json.dumps(data, default=str))
+            tmp.replace(path)
+        except Exception as e:
+            logger.debug("Could not write markets cache for %s: %s", exchange_id, e)
+    
+    async def refresh_markets(self, exchange_id: Optional[str] = None):
+        """Reload markets (one exchange or all) and drop lookups derived from them"""
+        exchange_ids = [exchange_id] if exchange_id else list(self._exchanges.keys())
+        
+        for ex_id in exchange_ids:
+            exchange = self._exchanges.get(ex_id)
+            if exchange is None:
+                continue
+            try:
+                await asyncio.wait_for(exchange.load_markets(reload=True), timeout=MARKET_LOAD_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"⚠ Failed to reload markets for {ex_id}: {type(e).__name__}")
+                continue
+            await asyncio.to_thread(self._save_cached_markets, ex_id, exchange)
+            self._index_markets(exchange)
+            self._invalidate_market_caches(ex_id)
+    
+    @staticmethod
+    def _index_markets(exchange: ccxt.Exchange):
+        """Snapshot market symbols into a frozenset and detect the exchange's symbol layout"""
+        markets = frozenset(exchange.markets.keys())
+        exchange._market_keyset = markets
+        exchange._sym_fmt = None
+        for base, quote in _SYMBOL_PROBE_PAIRS:
+            for fmt in _SYMBOL_FORMATS:
+                if fmt(base, quote) in markets:
+                    exchange._sym_fmt = fmt
+                    return
+    
+    def _invalidate_market_caches(self, exchange_id: str):
+        """Forget symbol lookups for an exchange after its markets changed"""
+        self._exchange_pair_plans.pop(exchange_id, None)
+        for key in [k for k in self._symbol_cache if k[0] == exchange_id]:
+            del self._symbol_cache[key]
+    
+    def _get_pair_plan(
+        self,
+        exchange_id: str,
+        exchange: ccxt.Exchange
+    ) -> tuple[list[str], dict[str, str]]:
+        """Get (exchange_symbols, symbol_map) for the current pair list, building it once"""
+        plan = self._exchange_pair_plans.get(exchange_id)
+        if plan is None:
+            exchange_symbols = []
+            symbol_map = {} # exchange_symbol -> normalized_symbol
+            
+            for base, quote, norm_symbol in self._normalized_pairs:
+                ex_symbol = self._get_symbol(exchange, base, quote)
+                if ex_symbol:
+                    exchange_symbols.append(ex_symbol)
+                    symbol_map[ex_symbol] = norm_symbol
+            
+            plan = (exchange_symbols, symbol_map)
+            self._exchange_pair_plans[exchange_id] = plan
+        return plan
+    
     async def close(self):
         """Close all exchange connections"""
+        # CCXT only closes sessions it created itself, so the injected
+        # global session stays open (rpc_manager.close() owns it)
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
         for exchange in self._exchanges.values():
             await exchange.close()
     
     def _get_symbol(self, exchange: ccxt.Exchange, base: str, quote: str) -> Optional[str]:
         """Get the correct symbol format for an exchange"""
+        key = (exchange.id, base, quote)
+        hit = self._symbol_cache.get(key, _MISSING)
+        if hit is not _MISSING:
+            return hit
+        
+        symbol = self._resolve_symbol(exchange, base, quote)
+        self._symbol_cache[key] = symbol
+        return symbol
+    
+    def _resolve_symbol(self, exchange: ccxt.Exchange, base: str, quote: str) -> Optional[str]:
+        """Find the exchange symbol for a pair by probing the markets"""
         # Normalize wrapped tokens
         base = normalize_symbol(base)
         quote = normalize_symbol(quote)
         
         # Try mapped symbols first
-        # (This is a simplified check, ideally we cache this map)
+        markets = exchange._market_keyset
         target = f"{base}/{quote}"
-        if target in exchange.markets:
+        if target in markets:
             return target
+        
+        # Layout detected at init, one probe
+        fmt = exchange._sym_fmt
+        if fmt is not None:
+            candidate = fmt(base, quote)
+            if candidate in markets:
+                return candidate
             
         # Common variations
         variations = [
@@ -124,7 +294,7 @@ class CCXTFetcher:
         ]
         
         for var in variations:
-            if var and var in exchange.markets:
+            if var and var in markets:
                 return var
         
         return None
@@ -147,7 +317,7 @@ class CCXTFetcher:
         
         try:
             # Rate limit
-            await rate_limiter.acquire(f"cex:{exchange_id}")
+            await rate_limiter.acquire(exchange._rl_key)
             
             ticker = await exchange.fetch_ticker(symbol)
             
@@ -164,7 +334,7 @@ class CCXTFetcher:
 
             return CEXPrice(
                 exchange=exchange_id,
-                symbol=f"{normalize_symbol(base)}/{normalize_symbol(quote)}",
+                symbol=normalize_pair(base, quote),
                 bid=float(bid),
                 ask=float(ask),
                 mid=(float(bid) + float(ask)) / 2,
@@ -173,7 +343,7 @@ class CCXTFetcher:
             )
             
         except Exception as e:
-            logger.debug(f"Failed to fetch {symbol} from {exchange_id}: {e}")
+            logger.debug("Failed to fetch %s from %s: %s", symbol, exchange_id, e)
             return None
     
     async def fetch_all_prices(
@@ -184,51 +354,50 @@ class CCXTFetcher:
         """
         Fetch prices for all pairs from all exchanges
         Returns dict: symbol -> list of prices from different exchanges
+        
+        Per-exchange symbol plans are cached for the given `pairs` list object;
+        pass a new list (not an in-place mutation) to change the pair set.
         """
         if not self._initialized:
             await self.initialize()
         
-        if pairs is None:
-            pairs = TRADING_PAIRS
+        # Plans are reused until a different pair list is passed in
+        if pairs is not self._planned_pairs:
+            self._planned_pairs = pairs
+            if pairs is None:
+                self._normalized_pairs = NORMALIZED_TRADING_PAIRS
+            else:
+                self._normalized_pairs = [(base, quote, normalize_pair(base, quote)) for base, quote in pairs]
+            self._exchange_pair_plans = {}
         
         results: dict[str, list[CEXPrice]] = {}
         # Initialize result lists
-        for base, quote in pairs:
-            symbol = f"{normalize_symbol(base)}/{normalize_symbol(quote)}"
-            results[symbol] = []
+        for _, _, norm_symbol in self._normalized_pairs:
+            results[norm_symbol] = []
         
         # Group by exchange to use batch fetching
         tasks = []
         
-        
         for exchange_id, exchange in self._exchanges.items():
             # Skip excluded exchanges (e.g. those handled by WebSocket)
             if exclude_exchanges and exchange_id in exclude_exchanges:
                 continue
 
-            # Find valid symbols for this exchange
-            exchange_symbols = []
-            symbol_map = {} # exchange_symbol -> normalized_symbol
-            
-            for base, quote in pairs:
-                ex_symbol = self._get_symbol(exchange, base, quote)
-                if ex_symbol:
-                    exchange_symbols.append(ex_symbol)
-                    normalized = f"{normalize_symbol(base)}/{normalize_symbol(quote)}"
-                    symbol_map[ex_symbol] = normalized
+            # Valid symbols for this exchange
+            exchange_symbols, symbol_map = self._get_pair_plan(exchange_id, exchange)
             
             if exchange_symbols:
                 tasks.append(self._fetch_exchange_batch(exchange_id, exchange_symbols, symbol_map))
         
-        # Execute all batches concurrently
-        batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Merge results
-        for batch in batch_results:
-            if isinstance(batch, dict):
-                for norm_symbol, price in batch.items():
-                    if norm_symbol in results:
-                        results[norm_symbol].append(price)
+        # Execute batches concurrently (bounded), merging each as soon as it lands
+        for fut in asyncio.as_completed(tasks):
+            try:
+                batch = await fut
+            except Exception:
+                continue
+            for norm_symbol, price in batch.items():
+                if norm_symbol in results:
+                    results[norm_symbol].append(price)
         
         return results
 
@@ -238,30 +407,27 @@ class CCXTFetcher:
         symbols: list[str], 
         symbol_map: dict[str, str]
     ) -> dict[str, CEXPrice]:
-        """Helper to fetch a batch and map back to normalized symbols"""
+        """Helper to fetch a batch keyed by normalized symbols"""
         try:
-            # Use existing batch fetcher
-            prices = await self.fetch_ticker_batch(exchange_id, symbols)
-            
-            mapped_results = {}
-            for ex_symbol, price in prices.items():
-                if ex_symbol in symbol_map:
-                    # Update the price object with normalized symbol
-                    price.symbol = symbol_map[ex_symbol]
-                    mapped_results[price.symbol] = price
-            return mapped_results
+            # Use existing batch fetcher; prices come back already normalized
+            async with self._batch_semaphore:
+                return await self.fetch_ticker_batch(exchange_id, symbols, symbol_map)
         except Exception as e:
-            logger.debug(f"Batch fetch failed for {exchange_id}: {e}")
+            logger.debug("Batch fetch failed for %s: %s", exchange_id, e)
             return {}
     
     async def fetch_ticker_batch(
         self,
         exchange_id: str,
-        symbols: list[str]
+        symbols: list[str],
+        symbol_map: Optional[dict[str, str]] = None
     ) -> dict[str, CEXPrice]:
         """
         Fetch multiple tickers from a single exchange in one request
         More efficient than individual requests
+        
+        If `symbol_map` (exchange_symbol -> normalized_symbol) is given, prices are
+        built and keyed with the normalized symbol; symbols missing from it are dropped.
         """
         if exchange_id not in self._exchanges:
             return {}
@@ -269,19 +435,20 @@ class CCXTFetcher:
         exchange = self._exchanges[exchange_id]
         
         try:
-            await rate_limiter.acquire(f"cex:{exchange_id}")
-            
             # Filter to only symbols that exist on this exchange
-            valid_symbols = [s for s in symbols if s in exchange.markets]
+            market_keys = exchange._market_keyset
+            valid_symbols = [s for s in symbols if s in market_keys]
             
             if not valid_symbols:
                 return {}
             
             # Some exchanges support fetching all tickers at once
-            if exchange.has.get('fetchTickers'):
+            if exchange._has_fetch_tickers:
+                await rate_limiter.acquire(exchange._rl_key)
                 tickers = await exchange.fetch_tickers(valid_symbols)
             else:
-                # Fall back to individual requests
+                # Fall back to individual requests, reserving their tokens up front
+                await rate_limiter.acquire_many(exchange._rl_key, len(valid_symbols))
                 tickers = {}
                 for symbol in valid_symbols:
                     try:
@@ -290,32 +457,43 @@ class CCXTFetcher:
                         continue
             
             results = {}
+            # Hoisted out of the per-ticker loop
+            map_get = symbol_map.get if symbol_map is not None else None
+            now_ms = int(time.time() * 1000)
+            Price = CEXPrice
             for symbol, ticker in tickers.items():
-                bid = ticker.get('bid') or 0
-                ask = ticker.get('ask') or 0
+                if map_get is not None:
+                    symbol = map_get(symbol)
+                    if symbol is None:
+                        continue
+                
+                get = ticker.get
+                bid = get('bid') or 0
+                ask = get('ask') or 0
                 
                 if bid <= 0 or ask <= 0:
                     continue
                 
-                if not ticker.get('timestamp') or ticker.get('timestamp') <= 0:
-                    ts = int(time.time() * 1000)
-                else:
-                    ts = ticker.get('timestamp')
-
-                results[symbol] = CEXPrice(
+                ts = get('timestamp')
+                if not ts or ts <= 0:
+                    ts = now_ms
+                
+                bid = float(bid)
+                ask = float(ask)
+                results[symbol] = Price(
                     exchange=exchange_id,
                     symbol=symbol,
-                    bid=float(bid),
-                    ask=float(ask),
-                    mid=(float(bid) + float(ask)) / 2,
+                    bid=bid,
+                    ask=ask,
+                    mid=(bid + ask) / 2,
                     timestamp=ts,
-                    volume_24h=ticker.get('quoteVolume')
+                    volume_24h=get('quoteVolume')
                 )
             
             return results
             
         except Exception as e:
-            logger.debug(f"Failed to fetch tickers from {exchange_id}: {e}")
+            logger.debug("Failed to fetch tickers from %s: %s", exchange_id, e)
             return {}
     
     def get_available_exchanges(self) -> list[str]:
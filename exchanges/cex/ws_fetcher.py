@@ -3,19 +3,24 @@ WebSocket-based price fetcher (CCXT Pro)
 Provides real-time price updates for HFT arbitrage
 """
 import asyncio
+import logging
 import ccxt.pro as ccxt
-from typing import Dict, List, Optional
+import numpy as np
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
-from datetime import datetime
+from time import time as _now
 
 from config.exchanges import EXCHANGES, ExchangeConfig
-from config.tokens import TRADING_PAIRS, normalize_symbol
+from config.tokens import NORMALIZED_TRADING_PAIRS
 from utils.logger import get_logger
 from utils.rpc_manager import get_global_session
 
 logger = get_logger(__name__)
 
-@dataclass
+# Upper bound on WS connections per exchange (further capped by ExchangeConfig.ws_shards)
+MAX_WS_SHARDS = 3
+
+@dataclass(slots=True, frozen=True)
 class WSPrice:
     exchange: str
     symbol: str
@@ -32,12 +37,30 @@ class CCXTProFetcher:
     
     def __init__(self):
         self._exchanges: Dict[str, ccxt.Exchange] = {}
-        self._latest_prices: Dict[str, Dict[str, WSPrice]] = {}
+        self._configs: Dict[str, ExchangeConfig] = {}
+        # Extra instances backing symbol shards beyond the first connection
+        self._shard_exchanges: List[ccxt.Exchange] = []
+        # SoA price cache: (n_exchanges, n_symbols) matrices, NaN until first tick.
+        # Per-exchange arrays below are row views into these matrices.
+        self._symbols: List[str] = []
+        self._sym_col: Dict[str, int] = {}
+        self._ex_row: Dict[str, int] = {}
+        self._bid_matrix = np.empty((0, 0), dtype=np.float64)
+        self._ask_matrix = np.empty((0, 0), dtype=np.float64)
+        self._ts_matrix = np.empty((0, 0), dtype=np.float64)
+        # (exchange_id, symbol) -> flat index into the raveled matrices (read path)
+        self._key_ids: Dict[Tuple[str, str], int] = {}
+        self._bids: Dict[str, np.ndarray] = {}
+        self._asks: Dict[str, np.ndarray] = {}
+        self._ts: Dict[str, np.ndarray] = {}
         self._running = False
         self._tasks: List[asyncio.Task] = []
 
     async def initialize(self):
         """Initialize WebSocket connections"""
+        loop = asyncio.get_running_loop()
+        logger.info(f"WebSocket streams running on {type(loop).__module__}.{type(loop).__name__}")
+        
         # Top-tier exchanges with reliable WebSocket support
         WS_SUPPORTED = [
             "binance", "bybit", "okx", "gateio", "kucoin", 
@@ -48,37 +71,50 @@ class CCXTProFetcher:
         for config in EXCHANGES:
             if config.id in WS_SUPPORTED:
                 try:
-                    session = await get_global_session()
-                    exchange_class = getattr(ccxt, config.id)
-                    # CCXT Pro exchanges
-                    self._exchanges[config.id] = exchange_class({
-                        'enableRateLimit': True,
-                        'options': {'defaultType': 'spot'},
-                        'session': session,
-                        'newUpdates': True
-                    })
-                    self._latest_prices[config.id] = {}
+                    self._exchanges[config.id] = await self._create_exchange(config.id)
+                    self._configs[config.id] = config
                     logger.info(f"Initialized WebSocket for {config.name}")
                 except Exception as e:
                     logger.error(f"Failed to init WS for {config.id}: {e}")
 
+    async def _create_exchange(self, exchange_id: str) -> ccxt.Exchange:
+        """Build a CCXT Pro instance on the shared aiohttp session"""
+        session = await get_global_session()
+        exchange_class = getattr(ccxt, exchange_id)
+        # CCXT Pro exchanges
+        return exchange_class({
+            'enableRateLimit': True,
+            'options': {'defaultType': 'spot'},
+            'session': session,
+            'newUpdates': True
+        })
+
     async def _watch_exchange_tickers(self, exchange_id: str, symbols: List[str]):
-        """Continuous loop to watch tickers via WebSocket"""
+        """Resolve symbols for an exchange and stream them over sharded connections"""
         exchange = self._exchanges[exchange_id]
         
+        # Markets are None until loaded; the pre-filter below needs them
+        try:
+            await exchange.load_markets()
+        except Exception as e:
+            logger.debug("WS market load failed on %s: %s", exchange_id, e)
+            return
+        markets = exchange.markets
+        
         # Pre-filter symbols that exist in market
         valid_symbols = []
         for s in symbols:
-            if s in exchange.markets:
-                valid_symbols.append(s)
+            col = self._sym_col[s]
+            if s in markets:
+                valid_symbols.append((s, col))
             else:
                 # Try common variations
                 parts = s.split('/')
                 if len(parts) == 2:
                     vars = [f"{parts[0]}{parts[1]}", f"{parts[0]}-{parts[1]}"]
                     for var in vars:
-                        if var in exchange.markets:
-                            valid_symbols.append(var)
+                        if var in markets:
+                            valid_symbols.append((var, col))
                             break
         
         if not valid_symbols:
@@ -87,36 +123,82 @@ class CCXTProFetcher:
         # Optimization: Limit symbols per connection if needed
         # CCXT Pro handles many, but let's be safe.
         max_symbols = 250
-        hot_symbols = valid_symbols[:max_symbols]
+        hot = valid_symbols[:max_symbols]
+        hot_symbols = [s for s, _ in hot]
+
+        # Column index is keyed by both the exchange symbol and its unified form
+        idx: Dict[str, int] = {}
+        for s, col in hot:
+            idx[s] = col
+            idx[markets[s].get('symbol', s)] = col
+        base = self._ex_row[exchange_id] * len(self._symbols)
+        for s, col in idx.items():
+            self._key_ids[(exchange_id, s)] = base + col
+
+        # Shard symbols across separate connections so each socket parses less per tick
+        config = self._configs.get(exchange_id)
+        k = min(MAX_WS_SHARDS, config.ws_shards if config else 1, len(hot_symbols))
+        k = max(k, 1)
+        shards = [hot_symbols[j::k] for j in range(k)]
+        
+        instances = [exchange]
+        for _ in range(k - 1):
+            try:
+                inst = await self._create_exchange(exchange_id)
+                inst.set_markets(markets, exchange.currencies)
+            except Exception as e:
+                logger.debug("WS shard init failed on %s: %s", exchange_id, e)
+                break
+            self._shard_exchanges.append(inst)
+            instances.append(inst)
+        
+        if len(instances) < k:
+            # Fold unassigned shards back onto the connections we have
+            shards = [hot_symbols[j::len(instances)] for j in range(len(instances))]
+        
+        await asyncio.gather(*(
+            self._watch_shard(exchange_id, inst, shard, idx)
+            for inst, shard in zip(instances, shards)
+        ))
+
+    async def _watch_shard(self, exchange_id: str, exchange: ccxt.Exchange, symbols: List[str], idx: Dict[str, int]):
+        """Continuous loop to watch one shard of tickers via WebSocket"""
+        bids = self._bids[exchange_id]
+        asks = self._asks[exchange_id]
+        tss = self._ts[exchange_id]
+
+        # Hoisted out of the per-tick loop
+        idx_get = idx.get
+        watch = exchange.watch_tickers
+        now = _now
 
         while self._running:
             try:
-                # watch_tickers returns a dict of all symbols that updated
-                tickers = await exchange.watch_tickers(hot_symbols)
+                # With newUpdates, watch_tickers returns only the symbols that changed
+                tickers = await watch(symbols)
                 
                 for symbol, ticker in tickers.items():
-                    bid = ticker.get('bid')
-                    ask = ticker.get('ask')
+                    get = ticker.get
+                    bid = get('bid')
+                    ask = get('ask')
                     
                     if not bid or not ask or bid <= 0 or ask <= 0:
                         continue
-                        
-                    # Normalize back for internal pricing matrix
-                    norm_symbol = symbol
-                    if symbol in exchange.markets:
-                        norm_symbol = exchange.markets[symbol].get('symbol', symbol)
                     
-                    self._latest_prices[exchange_id][norm_symbol] = WSPrice(
-                        exchange=exchange_id,
-                        symbol=norm_symbol,
-                        bid=float(bid),
-                        ask=float(ask),
-                        timestamp=ticker['timestamp'] / 1000.0 if ticker.get('timestamp') else datetime.now().timestamp()
-                    )
+                    i = idx_get(symbol)
+                    if i is None:
+                        continue
+                    
+                    ts = get('timestamp')
+                    bids[i] = bid
+                    asks[i] = ask
+                    tss[i] = ts * 0.001 if ts else now()
             except asyncio.CancelledError:
                 break
-            except Exception:
-                await asyncio.sleep(5) 
+            except Exception as e:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("WS ticker stream error on %s: %s", exchange_id, e)
+                await asyncio.sleep(5)
 
     async def start(self, symbols: Optional[List[str]] = None):
         """Start all WebSocket streams"""
@@ -127,14 +209,33 @@ class CCXTProFetcher:
         
         # Default to TRADING_PAIRS if no symbols provided
         if not symbols:
-            symbols = [f"{normalize_symbol(b)}/{normalize_symbol(q)}" for b, q in TRADING_PAIRS]
+            symbols = [norm_symbol for _, _, norm_symbol in NORMALIZED_TRADING_PAIRS]
+        
+        self._allocate(symbols)
         
         for exchange_id in self._exchanges:
-            task = asyncio.create_task(self._watch_exchange_tickers(exchange_id, symbols))
+            task = asyncio.create_task(self._watch_exchange_tickers(exchange_id, self._symbols))
             self._tasks.append(task)
             
         logger.info(f"Real-time WS streaming started for {len(self._exchanges)} exchanges")
 
+    def _allocate(self, symbols: List[str]):
+        """Allocate the shared price matrices and per-exchange row views"""
+        self._symbols = list(dict.fromkeys(symbols))
+        self._sym_col = {s: i for i, s in enumerate(self._symbols)}
+        self._ex_row = {ex: r for r, ex in enumerate(self._exchanges)}
+        self._key_ids = {}
+        
+        shape = (len(self._ex_row), len(self._symbols))
+        self._bid_matrix = np.full(shape, np.nan, dtype=np.float64)
+        self._ask_matrix = np.full(shape, np.nan, dtype=np.float64)
+        self._ts_matrix = np.full(shape, np.nan, dtype=np.float64)
+        
+        for ex, r in self._ex_row.items():
+            self._bids[ex] = self._bid_matrix[r]
+            self._asks[ex] = self._ask_matrix[r]
+            self._ts[ex] = self._ts_matrix[r]
+
     async def stop(self):
         """Stop all streams"""
         self._running = False
@@ -146,17 +247,71 @@ class CCXTProFetcher:
             await asyncio.gather(*self._tasks, return_exceptions=True)
             self._tasks = []
             
-        for exchange in self._exchanges.values():
+        for exchange in [*self._exchanges.values(), *self._shard_exchanges]:
             try:
                 await exchange.close()
             except:
                 pass
+        self._shard_exchanges = []
         
         logger.info("WebSocket streams stopped")
 
     def get_latest_price(self, exchange_id: str, symbol: str) -> Optional[WSPrice]:
         """Get the last seen price from cache (O(1) access)"""
-        return self._latest_prices.get(exchange_id, {}).get(symbol)
+        i = self._key_ids.get((exchange_id, symbol))
+        if i is None:
+            return None
+        bid = self._bid_matrix.flat[i]
+        if not bid > 0:
+            # Slot allocated but no tick received yet (NaN)
+            return None
+        return WSPrice(
+            exchange=exchange_id,
+            symbol=symbol,
+            bid=float(bid),
+            ask=float(self._ask_matrix.flat[i]),
+            timestamp=float(self._ts_matrix.flat[i])
+        )
+
+    @property
+    def symbols(self) -> List[str]:
+        """Symbols labelling the snapshot columns"""
+        return self._symbols
+
+    @property
+    def exchange_rows(self) -> Dict[str, int]:
+        """Exchange id -> snapshot row"""
+        return self._ex_row
+
+    def snapshot(self):
+        """
+        Copy of the (n_exchanges, n_symbols) bid and ask matrices.
+        Entries without a tick yet are NaN; mask with np.isfinite.
+        """
+        return self._bid_matrix.copy(), self._ask_matrix.copy()
+
+    def timestamps(self) -> np.ndarray:
+        """Copy of the (n_exchanges, n_symbols) last-update timestamps (seconds)"""
+        return self._ts_matrix.copy()
+
+    def best_quotes(self):
+        """
+        Best bid/ask across exchanges for every symbol column.
+        Returns (best_bid_row, best_bid, best_ask_row, best_ask);
+        symbols with no quote at all get best_bid=-inf / best_ask=inf.
+        """
+        bids, asks = self.snapshot()
+        valid = np.isfinite(bids) & np.isfinite(asks)
+        bids = np.where(valid, bids, -np.inf)
+        asks = np.where(valid, asks, np.inf)
+        if bids.shape[0] == 0:
+            n = bids.shape[1]
+            empty = np.zeros(n, dtype=np.intp)
+            return empty, np.full(n, -np.inf), empty, np.full(n, np.inf)
+        best_bid_row = np.argmax(bids, axis=0)
+        best_ask_row = np.argmin(asks, axis=0)
+        cols = np.arange(bids.shape[1])
+        return best_bid_row, bids[best_bid_row, cols], best_ask_row, asks[best_ask_row, cols]
 
 # Global instance for HFT
 ws_fetcher = CCXTProFetcher()
@@ -2,25 +2,45 @@
 Combined DEX fetcher that aggregates prices from all DEXs
 """
 import asyncio
+import json
+import sys
 import time
-from dataclasses import dataclass
+from collections import defaultdict
+import numpy as np
+from aiohttp import ClientError
+from web3.exceptions import Web3Exception
+from dataclasses import dataclass, field, replace
+from pathlib import Path
 from typing import Optional
 
-from config.chains import ChainId
-from config.tokens import Token, ALL_TOKENS, get_tokens_for_chain, normalize_symbol
+from config.chains import ChainId, CHAINS
+from config.tokens import Token, ALL_TOKENS, get_tokens_for_chain, normalize_pair
 from config.settings import DEFAULT_TRADE_SIZE_USD
-from exchanges.dex.base_dex import DEXPrice
 from exchanges.dex.uniswap_v2 import UniswapV2DEX, create_dex_instances
 from exchanges.dex.uniswap_v3 import UniswapV3DEX, create_v3_instances
 from exchanges.dex.curve import CurveDEX, create_curve_instances
 from utils.logger import get_logger
 from core.network.multicall import Multicall
 from utils.rpc_manager import rpc_manager
+from utils.rate_limiter import rate_limiter
 
 logger = get_logger(__name__)
 
+# Quote tokens whose pool liquidity is judged in units (>= 2) rather than ~USD (>= 10k)
+NATIVE_QUOTE_SYMBOLS = frozenset({"ETH", "WETH", "BTC", "WBTC", "BNB", "WBNB"})
 
-@dataclass
+# How long initialize() waits on contract / connection warm-up before moving on
+WARMUP_TIMEOUT = 5.0
+
+# Deadline for a whole fetch_all_prices() scan; individual RPCs are bounded by the transport
+SCAN_TIMEOUT = 20.0
+
+# Pools rejected for low liquidity sit out 1 min, then 5 min, then 30 min per repeat
+DEAD_POOL_BACKOFF = (60, 300, 1800)
+DEAD_POOLS_FILE = Path("markets_cache") / "dead_pools.json"  # Next to the CEX markets cache
+
+
+@dataclass(slots=True, frozen=True)
 class DEXQuote:
     """Aggregated DEX quote with normalized price"""
     dex_name: str
@@ -31,18 +51,85 @@ class DEXQuote:
     bid: float  # Price to sell 1 base token (in quote tokens)
     ask: float  # Price to buy 1 base token (in quote tokens)
     fee_percent: float
-    timestamp: float = 0
+    timestamp: float  # Wall time of the scan cycle that produced it (one sample per cycle)
+    # Derived once here instead of on every property access
+    source_id: str = field(init=False, repr=False, compare=False)  # Unique identifier for this price source
+    normalized_symbol: str = field(init=False, repr=False, compare=False)  # Normalized trading pair symbol
 
+    def __post_init__(self):
+        # Frozen: derived fields have to bypass __setattr__
+        object.__setattr__(self, "source_id", sys.intern(f"{self.dex_name}@{self.chain_name}"))
+        object.__setattr__(self, "normalized_symbol", normalize_pair(self.base_symbol, self.quote_symbol))
+
+
+def _restamp(quote: DEXQuote, cycle_ts: float) -> DEXQuote:
+    """
+    A block-cache hit stamped with the current cycle: the pool state is still valid,
+    but the original cycle's time would age out of the engine's freshness window
+    on slow-block chains
+    """
+    if quote.timestamp == cycle_ts:
+        return quote
+    return replace(quote, timestamp=cycle_ts)
+
+
+class DEXQuoteBatch:
+    """
+    All DEX quotes for one normalized pair, kept alongside columnar NumPy buffers
+    (bid / ask / fee / timestamp) so ranking and filtering run as array ops.
+    Iterates like the list of DEXQuotes it replaces.
+    """
+    __slots__ = ("quotes", "_bid", "_ask", "_fee", "_ts")
+    
+    def __init__(self, capacity: int = 16):
+        self.quotes: list[DEXQuote] = []
+        self._bid = np.empty(capacity)
+        self._ask = np.empty(capacity)
+        self._fee = np.empty(capacity)
+        self._ts = np.empty(capacity)
+    
+    def append(self, quote: DEXQuote):
+        n = len(self.quotes)
+        if n == len(self._bid):
+            # Rare: more sources than preallocated rows
+            self._bid, self._ask, self._fee, self._ts = (
+                np.resize(col, 2 * n) for col in (self._bid, self._ask, self._fee, self._ts)
+            )
+        self._bid[n] = quote.bid
+        self._ask[n] = quote.ask
+        self._fee[n] = quote.fee_percent
+        self._ts[n] = quote.timestamp
+        self.quotes.append(quote)
+    
+    def __len__(self) -> int:
+        return len(self.quotes)
+    
+    def __iter__(self):
+        return iter(self.quotes)
+    
+    @property
+    def bid(self) -> np.ndarray:
+        return self._bid[:len(self.quotes)]
+    
+    @property
+    def ask(self) -> np.ndarray:
+        return self._ask[:len(self.quotes)]
     
     @property
-    def source_id(self) -> str:
-        """Unique identifier for this price source"""
-        return f"{self.dex_name}@{self.chain_name}"
+    def fee_percent(self) -> np.ndarray:
+        return self._fee[:len(self.quotes)]
     
     @property
-    def normalized_symbol(self) -> str:
-        """Normalized trading pair symbol"""
-        return f"{normalize_symbol(self.base_symbol)}/{normalize_symbol(self.quote_symbol)}"
+    def timestamp(self) -> np.ndarray:
+        return self._ts[:len(self.quotes)]
+    
+    def best_bid(self) -> Optional[DEXQuote]:
+        """Quote with the highest bid"""
+        return self.quotes[int(np.argmax(self.bid))] if self.quotes else None
+    
+    def best_ask(self) -> Optional[DEXQuote]:
+        """Quote with the lowest ask"""
+        return self.quotes[int(np.argmin(self.ask))] if self.quotes else None
 
 
 class DEXAggregator:
@@ -55,20 +142,86 @@ class DEXAggregator:
         self._v3_dexs: list[UniswapV3DEX] = []
         self._curve_dexs: list[CurveDEX] = []
         self._initialized = False
-        self._semaphore = asyncio.Semaphore(25)  # Lower concurrency to prevent RPC timeouts
+        self._semaphore = asyncio.Semaphore(100)  # One slot per in-flight multicall; matches the per-host pool
+        self._multicalls: dict[ChainId, Multicall] = {}
+        self._token_index: dict[tuple[ChainId, str], Token] = {}  # (chain, symbol) -> Token
+        # (chain, base, quote) -> (base_scale, quote_scale, dec_adj); decimals never change
+        self._dec_cache: dict[tuple[ChainId, str, str], tuple[int, int, float]] = {}
+        # chain -> (block_number, {(dex_name, base, quote): quote or None}); swapped on new block
+        self._quote_cache: dict[ChainId, tuple[int, dict[tuple[str, str, str], Optional[DEXQuote]]]] = {}
+        self._failed_quotes = 0  # Expected RPC/pool failures swallowed by get_price()
+        # (chain, dex, base, quote) -> (retry_after wall time, strikes); survives restarts via DEAD_POOLS_FILE
+        self._dead_pools: dict[tuple[str, str, str, str], tuple[float, int]] = {}
+        self._dead_pools_dirty = False
+        self._dexs_by_chain: dict[ChainId, list] = {}
+        # Event-driven refresh: pairs of the latest scan, re-quoted on every newHeads push
+        self._watched_pairs: list[tuple[str, str]] = []
+        self._block_refreshes: dict[ChainId, asyncio.Task] = {}
     
     async def initialize(self):
         """Initialize all DEX instances"""
         if self._initialized:
             return
         
+        self._token_index = {
+            (chain_id, token.symbol): token
+            for token in ALL_TOKENS
+            for chain_id in token.addresses
+        }
+        
+        # Factories only build objects from config; no I/O worth threading
         self._v2_dexs = create_dex_instances()
         self._v3_dexs = create_v3_instances()
         self._curve_dexs = create_curve_instances()
+        all_dexs = self._v2_dexs + self._v3_dexs + self._curve_dexs
+        
+        # Group DEXs by chain
+        self._dexs_by_chain = {}
+        for dex in all_dexs:
+            self._dexs_by_chain.setdefault(dex.chain_id, []).append(dex)
+        
+        # Multicall chains with a WebSocket endpoint refresh their quotes as each block lands
+        subscribed = [
+            chain_id.name for chain_id in self._dexs_by_chain
+            if CHAINS[chain_id].has_multicall3 and rpc_manager.subscribe_new_heads(
+                chain_id, lambda block, chain_id=chain_id: self._on_new_head(chain_id, block)
+            )
+        ]
+        if subscribed:
+            logger.info(f"DEX quotes refresh on newHeads for: {', '.join(subscribed)}")
+        
+        # Warm up concurrently so the first scan skips contract building and TCP+TLS handshakes:
+        # every adapter's contracts plus one block-number read per chain (also seeds the block cache)
+        warmup = [asyncio.ensure_future(dex.prepare_contracts()) for dex in all_dexs]
+        warmup += [
+            asyncio.ensure_future(rpc_manager.get_latest_block(chain_id))
+            for chain_id in {dex.chain_id for dex in all_dexs}
+        ]
+        for task in warmup:
+            # Warm-up failures are harmless; the scan retries on demand
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        
+        self._dead_pools, _ = await asyncio.gather(
+            asyncio.to_thread(self._load_dead_pools),
+            # Slow endpoints keep warming in the background past the timeout
+            asyncio.wait(warmup, timeout=WARMUP_TIMEOUT)
+        )
         
         logger.info(f"[bold green]DEX Aggregator ready: {len(self._v2_dexs)} V2, {len(self._v3_dexs)} V3, {len(self._curve_dexs)} Curve[/bold green]")
         self._initialized = True
     
+    def _on_new_head(self, chain_id: ChainId, block: int):
+        """newHeads callback: quote the watched pairs into the new block's cache, one refresh per chain at a time"""
+        if not self._watched_pairs:
+            return
+        refresh = self._block_refreshes.get(chain_id)
+        if refresh is not None and not refresh.done():
+            # Still quoting an earlier head; the scan itself covers anything newer
+            return
+        self._block_refreshes[chain_id] = asyncio.create_task(self._fetch_chain_multicall(
+            chain_id, self._dexs_by_chain[chain_id], self._watched_pairs, defaultdict(DEXQuoteBatch), time.time()
+        ))
+    
     def _get_token_pair_for_chain(
         self,
         chain_id: ChainId,
@@ -76,28 +229,105 @@ class DEXAggregator:
         quote_symbol: str
     ) -> Optional[tuple[Token, Token]]:
         """Get token pair addresses for a chain"""
-        base_token = None
-        quote_token = None
-        
-        for token in ALL_TOKENS:
-            if token.symbol == base_symbol and chain_id in token.addresses:
-                base_token = token
-            if token.symbol == quote_symbol and chain_id in token.addresses:
-                quote_token = token
+        base_token = self._token_index.get((chain_id, base_symbol))
+        quote_token = self._token_index.get((chain_id, quote_symbol))
         
         if base_token and quote_token:
             return (base_token, quote_token)
         return None
     
+    def _get_multicall(self, chain_id: ChainId, web3) -> Multicall:
+        """Multicall wrapper per chain, rebuilt only when the best endpoint changes"""
+        multicall = self._multicalls.get(chain_id)
+        if multicall is None or multicall.web3 is not web3:
+            multicall = self._multicalls[chain_id] = Multicall(web3)
+        return multicall
+    
+    def _is_dead_pool(self, chain_id: ChainId, dex_name: str, base_symbol: str, quote_symbol: str) -> bool:
+        """True while a pool is backing off after failing the liquidity check"""
+        entry = self._dead_pools.get((chain_id.name, dex_name, base_symbol, quote_symbol))
+        return entry is not None and entry[0] > time.time()
+    
+    def _mark_dead_pool(self, key: tuple[str, str, str, str]):
+        """Push a pool's next retry out along DEAD_POOL_BACKOFF"""
+        strikes = self._dead_pools.get(key, (0.0, 0))[1]
+        delay = DEAD_POOL_BACKOFF[min(strikes, len(DEAD_POOL_BACKOFF) - 1)]
+        self._dead_pools[key] = (time.time() + delay, strikes + 1)
+        self._dead_pools_dirty = True
+    
+    @staticmethod
+    def _load_dead_pools() -> dict[tuple[str, str, str, str], tuple[float, int]]:
+        """Read still-relevant dead pool entries from disk (empty on any problem)"""
+        try:
+            rows = json.loads(DEAD_POOLS_FILE.read_text())
+            return {tuple(row[:4]): (float(row[4]), int(row[5])) for row in rows}
+        except Exception:
+            return {}
+    
+    @staticmethod
+    def _save_dead_pools(dead_pools: dict[tuple[str, str, str, str], tuple[float, int]]):
+        """Write the dead pool table for the next start"""
+        try:
+            DEAD_POOLS_FILE.parent.mkdir(exist_ok=True)
+            tmp = DEAD_POOLS_FILE.with_suffix(".tmp")
+            tmp.write_text(json.dumps([[*key, retry_at, strikes] for key, (retry_at, strikes) in dead_pools.items()]))
+            tmp.replace(DEAD_POOLS_FILE)
+        except Exception as e:
+            logger.debug(f"Could not write dead pool cache: {e}")
+    
+    async def _get_block_cache(self, chain_id: ChainId) -> Optional[dict]:
+        """Quote cache for the chain's current block (None if the block is unknown)"""
+        try:
+            block = await rpc_manager.get_latest_block(chain_id)
+        except Exception:
+            return None
+        
+        cached = self._quote_cache.get(chain_id)
+        if cached is None or cached[0] != block:
+            # New block: pool state may have changed, start a fresh dict
+            cached = self._quote_cache[chain_id] = (block, {})
+        return cached[1]
+    
+    def _pair_scales(
+        self,
+        chain_id: ChainId,
+        base_token: Token,
+        quote_token: Token
+    ) -> tuple[int, int, float]:
+        """(10**base_decimals, 10**quote_decimals, float base/quote decimal adjustment), memoized"""
+        key = (chain_id, base_token.symbol, quote_token.symbol)
+        scales = self._dec_cache.get(key)
+        if scales is None:
+            base_scale = 10 ** base_token.get_decimals(chain_id)
+            quote_scale = 10 ** quote_token.get_decimals(chain_id)
+            scales = self._dec_cache[key] = (base_scale, quote_scale, base_scale / quote_scale)
+        return scales
+    
+    @staticmethod
+    def _quote_amount(base_token: Token, base_scale: int) -> int:
+        """Input amount worth ~DEFAULT_TRADE_SIZE_USD of the base token (smallest units)"""
+        # approx_price_usd is refreshed from CEX data, so this is not cached
+        price_est = base_token.approx_price_usd or 0
+        target_amount = DEFAULT_TRADE_SIZE_USD / price_est if price_est > 0 else 1.0
+        # Clamp to minimum to avoid 0
+        if target_amount < 1e-6:
+            target_amount = 1e-6
+        amount_in = int(target_amount * base_scale)
+        return amount_in or base_scale # Fallback to 1 unit
+    
     async def get_price(
         self,
         base_symbol: str,
         quote_symbol: str,
         chain_id: ChainId,
         dex: UniswapV2DEX | UniswapV3DEX,
-        amount: int = 10**18  # Default 1 token
+        amount: int = 10**18,  # Default 1 token
+        cycle_ts: Optional[float] = None  # Scan-cycle timestamp to stamp the quote with
     ) -> Optional[DEXQuote]:
         """Get price from a specific DEX"""
+        if self._is_dead_pool(chain_id, dex.name, base_symbol, quote_symbol):
+            return None
+        
         tokens = self._get_token_pair_for_chain(chain_id, base_symbol, quote_symbol)
         if not tokens:
             return None
@@ -109,135 +339,232 @@ class DEXAggregator:
         if not base_address or not quote_address:
             return None
         
+        # Smart Sizing: Use ~DEFAULT_TRADE_SIZE_USD worth of tokens
+        amount_in_spot = self._quote_amount(base_token, self._pair_scales(chain_id, base_token, quote_token)[0])
+        
         # Get reserves and spot price
-        # HFT Optimization: Use a larger semaphore and timeout
+        # No per-call timer: the RPC transport enforces connect/read deadlines
         try:
             async with self._semaphore:
-                reserves_task = dex.get_reserves(base_address, quote_address)
-                
-                # Fetch price for a smaller amount checks
-                # Smart Sizing: Use ~DEFAULT_TRADE_SIZE_USD worth of tokens
-                target_amount_token = DEFAULT_TRADE_SIZE_USD / base_token.approx_price_usd
-                # Clamp to minimum 1 unit to avoid 0
-                if target_amount_token < 1e-6:
-                     target_amount_token = 1e-6 # Minimum sane amount
-                
-                amount_in_spot = int(target_amount_token * (10 ** base_token.get_decimals(chain_id)))
-                if amount_in_spot == 0:
-                     amount_in_spot = 10 ** base_token.get_decimals(chain_id) # Fallback to 1 unit
-                     
-                spot_task = dex.get_price(base_address, quote_address, amount_in_spot)
-                
-                # 15s timeout for DEX calls - give public RPCs time
-                reserves, spot_price_data = await asyncio.wait_for(
-                    asyncio.gather(reserves_task, spot_task, return_exceptions=True),
-                    timeout=15.0
-                )
-        except (asyncio.TimeoutError, Exception):
+                if CHAINS[chain_id].has_multicall3:
+                    # Reserves + spot fused into one aggregate3 round-trip
+                    web3 = await rpc_manager.get_web3(chain_id)
+                    multicall = self._get_multicall(chain_id, web3)
+                    await dex.prepare_contracts()
+                    await dex.resolve_pools([(base_address, quote_address)], multicall)
+                    calls = dex.get_quote_bundle_calldata(base_address, quote_address, amount_in_spot)
+                    if not calls:
+                        return None
+                    await rate_limiter.acquire(f"chain:{chain_id.name}")
+                    raw = await multicall.aggregate(calls)
+                    reserves, spot_price_data = dex.process_quote_bundle(
+                        raw, base_address, quote_address, amount_in_spot
+                    )
+                else:
+                    reserves, spot_price_data = await asyncio.gather(
+                        dex.get_reserves(base_address, quote_address),
+                        dex.get_price(base_address, quote_address, amount_in_spot),
+                        return_exceptions=True
+                    )
+        except (ClientError, Web3Exception, ValueError, asyncio.TimeoutError):
+            # Dead pools / flaky RPCs are routine here: count them, skip the traceback
+            # (web3 6.x reports JSON-RPC errors as ValueError)
+            self._failed_quotes += 1
             return None
         
+        return self._build_quotes([(
+            base_symbol, quote_symbol, chain_id, dex,
+            base_token, quote_token, reserves, spot_price_data
+        )], time.time() if cycle_ts is None else cycle_ts)[0]
+    
+    def _build_quotes(self, items: list[tuple], timestamp: float) -> list[Optional[DEXQuote]]:
+        """
+        Turn raw (reserves, spot quote) results into liquidity-checked DEXQuotes.
+        items: (base_symbol, quote_symbol, chain_id, dex, base_token, quote_token, reserves, spot_price_data)
+        The price / liquidity / slippage math runs as one NumPy pass over the batch.
+        """
+        out: list[Optional[DEXQuote]] = [None] * len(items)
+        
         # Validation
-        if isinstance(spot_price_data, Exception) or not spot_price_data or spot_price_data.price <= 0:
-            return None
-
-        # LIQUIDITY CHECK (Crucial for HFT)
-        # Filter out pools with low liquidity which cause massive slippage/price distortion
-        if not isinstance(reserves, Exception) and reserves:
-            res_in, res_out = reserves
+        idx = [
+            i for i, item in enumerate(items)
+            if item[7] and not isinstance(item[7], Exception) and item[7].price > 0
+        ]
+        if not idx:
+            return out
+        
+        n = len(idx)
+        price = np.empty(n)
+        dec_adj = np.empty(n)
+        base_scale = np.empty(n)
+        quote_scale = np.empty(n)
+        res_in = np.zeros(n)
+        res_out = np.zeros(n)
+        has_reserves = np.zeros(n, dtype=bool)
+        native_quote = np.zeros(n, dtype=bool)
+        for k, i in enumerate(idx):
+            _, quote_symbol, chain_id, _, base_token, quote_token, reserves, spot_price_data = items[i]
+            base_scale[k], quote_scale[k], dec_adj[k] = self._pair_scales(chain_id, base_token, quote_token)
+            price[k] = spot_price_data.price
+            native_quote[k] = quote_symbol in NATIVE_QUOTE_SYMBOLS
+            # V3 / Curve / errors have no reserve data
+            if reserves and not isinstance(reserves, Exception):
+                res_in[k], res_out[k] = reserves
+                has_reserves[k] = True
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Reserve ratio beats getAmountsOut(1 unit), which distorts illiquid V2 pools
+            reserve_price = np.where(res_in > 0, (res_out / quote_scale) / (res_in / base_scale), 0.0)
+            spot_price = np.where(reserve_price > 0, reserve_price, price * dec_adj)
             
-            # 1. Check Raw Token Amounts (Avoid dust pools)
-            # If base token reserves are too low (e.g. < 0.1 ETH), skip
-            # Need approximate USD value. 
+            # LIQUIDITY CHECK (Crucial for HFT)
+            # Quote-token units in the pool: ~USD for stables, >= 2 units for native/BTC quotes
+            liquidity_val = res_out / quote_scale
+            liquid = ~has_reserves | np.where(native_quote, liquidity_val >= 2, liquidity_val >= 10000)
             
-            # Calculate Spot Price from Reserves (Ratio) if possible (V2)
-            # This is more accurate than getAmountsOut(1 Unit) for illiquid pools
-            if res_in > 0:
-                base_decimals = base_token.get_decimals(chain_id)
-                quote_decimals = quote_token.get_decimals(chain_id)
-                reserve_price = (res_out / (10**quote_decimals)) / (res_in / (10**base_decimals))
-            else:
-                reserve_price = 0
-                
-            # Use reserve price if reasonable, otherwise fallback to spot_price_data
-            # But spot_price_data uses getAmountsOut(1 Unit) which distorts illiquid pools.
-            # So Reserve Price is strictly better for V2.
+            # Exact x*y=k secant prices for a $1000 trade (V2 only; quoter prices include impact)
+            # Fee-free: the engine applies fee_percent on top
+            # sell dx: dy = y*dx / (x + dx)  ->  bid = spot * x / (x + dx)
+            # buy dx:  dy = y*dx / (x - dx)  ->  ask = spot * x / (x - dx), unquotable once dx >= x
+            trade_size_wei = np.floor((1000.0 / spot_price) * base_scale)
+            bid_price = np.where(has_reserves, spot_price * res_in / (res_in + trade_size_wei), spot_price)
+            ask_price = np.where(
+                has_reserves,
+                np.where(res_in > trade_size_wei, spot_price * res_in / (res_in - trade_size_wei), np.nan),
+                spot_price
+            )
             
-            dec_adj = 10 ** (base_token.get_decimals(chain_id) - quote_token.get_decimals(chain_id))
-            spot_price_from_quote = spot_price_data.price * dec_adj
+            # Final sanity check
+            ok = liquid & (spot_price > 0) & (bid_price > 0) & (ask_price > 0) & (bid_price <= 1e12)
+        
+        # Illiquid pools back off instead of being re-quoted every scan
+        for k in np.flatnonzero(has_reserves & ~liquid):
+            base_symbol, quote_symbol, chain_id, dex = items[idx[k]][:4]
+            self._mark_dead_pool((chain_id.name, dex.name, base_symbol, quote_symbol))
+        
+        for k in np.flatnonzero(ok):
+            base_symbol, quote_symbol, chain_id, dex, _, _, _, spot_price_data = items[idx[k]]
+            out[idx[k]] = DEXQuote(
+                dex_name=dex.name,
+                chain=chain_id,
+                chain_name=chain_id.name,
+                base_symbol=base_symbol,
+                quote_symbol=quote_symbol,
+                bid=float(bid_price[k]),
+                ask=float(ask_price[k]),
+                fee_percent=spot_price_data.fee_percent, # Per quote (V3 fee tier varies)
+                timestamp=timestamp
+            )
+            if self._dead_pools and self._dead_pools.pop((chain_id.name, dex.name, base_symbol, quote_symbol), None):
+                # Recovered pool starts its backoff over
+                self._dead_pools_dirty = True
+        return out
+    
+    async def _fetch_chain_multicall(
+        self,
+        chain_id: ChainId,
+        dexs: list,
+        pairs: list[tuple[str, str]],
+        results: dict[str, DEXQuoteBatch],
+        cycle_ts: float
+    ):
+        """Quote every (pair, DEX) of a Multicall3 chain in aggregate3 batches, reusing this block's cache"""
+        try:
+            web3 = await rpc_manager.get_web3(chain_id)
+            multicall = self._get_multicall(chain_id, web3)
+            block_cache = await self._get_block_cache(chain_id)
             
-            # Use the reserve price for V2 calculations if available
-            spot_price = reserve_price if reserve_price > 0 else spot_price_from_quote
+            # (base, quote, base_token, quote_token, base_addr, quote_addr, amount, norm_symbol)
+            chain_pairs = []
+            for base, quote in pairs:
+                tokens = self._get_token_pair_for_chain(chain_id, base, quote)
+                if not tokens: continue
+                
+                base_token, quote_token = tokens
+                base_addr = base_token.get_address(chain_id)
+                quote_addr = quote_token.get_address(chain_id)
+                amount_in = self._quote_amount(base_token, self._pair_scales(chain_id, base_token, quote_token)[0])
+                normalized = normalize_pair(base, quote)
+                chain_pairs.append((base, quote, base_token, quote_token, base_addr, quote_addr, amount_in, normalized))
             
-            # 2. Check Liquidity Value
-            # Approx value in Quote Token (USD usually)
-            liquidity_val = (res_out / (10**quote_token.get_decimals(chain_id)))
+            if not chain_pairs:
+                return
             
-            # If quote is USDT/USDC/DAI (Stable), liquidity_val is approx USD.
-            # If quote is ETH, we need ETH price.
-            # Simple heuristic: Reject if < 1000 units of quote token (unless it's WBTC/ETH)
-            # Better: $10k threshold.
-            # Assuming most quotes are stables or ETH.
-            threshold = 10000 
-            if quote_symbol in ["ETH", "WETH", "BTC", "WBTC", "BNB", "WBNB"]:
-                 threshold = 2 # Approx $4-5k for ETH, 
+            # V2 reserves need the pair/token0 lookups; adapters still encoding via contracts need those built
+            token_pairs = [(p[4], p[5]) for p in chain_pairs]
+            for dex in dexs:
+                await dex.prepare_contracts()
+            await asyncio.gather(
+                *(dex.resolve_pools(token_pairs, multicall) for dex in dexs),
+                return_exceptions=True
+            )
             
-            if liquidity_val < threshold and quote_symbol not in ["ETH", "WETH", "BTC", "WBTC", "BNB", "WBNB"]:
-                 # Strict check for stables
-                 return None
-            elif liquidity_val < 2 and quote_symbol in ["ETH", "WETH", "BTC", "WBTC", "BNB", "WBNB"]:
-                 # Strict check for native
-                 return None
-
-            # Calculate actual slippage
-            if spot_price > 0:
-                trade_size_base = 1000.0 / spot_price
-                trade_size_wei = int(trade_size_base * (10 ** base_token.get_decimals(chain_id)))
+            # Each (pair, DEX) quote is a bundle (price + reserves); bundles never straddle batches
+            BATCH_SIZE = 200 # Conservative batch size
+            batches = []
+            batch_calls = []
+            batch_bundles = []  # (dex, pair_entry, start, end) into batch_calls
+            for entry in chain_pairs:
+                base_addr, quote_addr, amount_in = entry[4], entry[5], entry[6]
+                for dex in dexs:
+                    if self._is_dead_pool(chain_id, dex.name, entry[0], entry[1]):
+                        continue
+                    if block_cache is not None:
+                        key = (dex.name, entry[0], entry[1])
+                        if key in block_cache:
+                            # Pool state can't change within a block; reuse the quote
+                            cached = block_cache[key]
+                            if cached:
+                                results[entry[7]].append(_restamp(cached, cycle_ts))
+                            continue
+                    calls = dex.get_quote_bundle_calldata(base_addr, quote_addr, amount_in)
+                    if not calls:
+                        continue
+                    if batch_calls and len(batch_calls) + len(calls) > BATCH_SIZE:
+                        batches.append((batch_calls, batch_bundles))
+                        batch_calls, batch_bundles = [], []
+                    batch_bundles.append((dex, entry, len(batch_calls), len(batch_calls) + len(calls)))
+                    batch_calls.extend(calls)
+            if batch_calls:
+                batches.append((batch_calls, batch_bundles))
+            
+            async def execute_batch(current_calls, current_bundles):
+                try:
+                    raw_results = await multicall.aggregate(current_calls)
+                except Exception as e:
+                    logger.debug(f"Batch execution failed on {chain_id.name}: {e}")
+                    return
                 
-                # Sell impact
-                sell_impact = trade_size_wei / (res_in + trade_size_wei)
+                items = []
+                for dex, entry, lo, hi in current_bundles:
+                    base, quote, base_token, quote_token, base_addr, quote_addr, amount_in, norm = entry
+                    reserves, spot_price_data = dex.process_quote_bundle(
+                        raw_results[lo:hi], base_addr, quote_addr, amount_in
+                    )
+                    items.append((base, quote, chain_id, dex, base_token, quote_token, reserves, spot_price_data))
                 
-                bid_price = spot_price * (1 - sell_impact)
-                ask_price = spot_price * (1 + sell_impact)
-            else:
-                return None
-        else:
-            # Fallback for V3 (no reserves) or errors
-            # V3 usually doesn't have the "1 ETH Swap distortion" as badly due to CL,
-            # but we should still be careful.
-            if isinstance(reserves, Exception) or not reserves:
-                # If we lack reserve data (V3), use the quoted price but maybe add a penalty
-                 dec_adj = 10 ** (base_token.get_decimals(chain_id) - quote_token.get_decimals(chain_id))
-                 spot_price = spot_price_data.price * dec_adj
-                 bid_price = spot_price
-                 ask_price = spot_price
-                 
-                 # V3 Quoter handles impact in the quote? 
-                 # get_price calls quoteExactInputSingle.
-                 # If we requested 1 ETH, it returns output for 1 ETH.
-                 # So price includes impact of 1 ETH.
-                 # HACK: If returned price is significantly different from expected, it's illiquid.
-                 pass
-
-        # Final sanity check
-        if bid_price <= 0 or ask_price <= 0 or bid_price > 1e12:
-            return None
+                # Whole batch priced in one vectorized pass
+                quotes = self._build_quotes(items, cycle_ts)
+                for (dex, entry, _, _), quote_obj in zip(current_bundles, quotes):
+                    base, quote, norm = entry[0], entry[1], entry[7]
+                    if block_cache is not None:
+                        block_cache[(dex.name, base, quote)] = quote_obj
+                    if quote_obj:
+                        results[norm].append(quote_obj)
             
-        return DEXQuote(
-            dex_name=dex.name,
-            chain=chain_id,
-            chain_name=chain_id.name,
-            base_symbol=base_symbol,
-            quote_symbol=quote_symbol,
-            bid=bid_price,
-            ask=ask_price,
-            fee_percent=dex.fee_percent,
-            timestamp=time.time()
-        )
+            # One aggregate3 eth_call per batch, all batches of the chain in flight together;
+            # the whole round is authorized with a single debit
+            if batches:
+                await rate_limiter.acquire_many(f"chain:{chain_id.name}", len(batches))
+            await asyncio.gather(*(execute_batch(c, b) for c, b in batches))
+                
+        except Exception as e:
+            logger.error(f"Multicall chain process failed {chain_id.name}: {e}")
     
     async def fetch_all_prices(
         self,
         pairs: list[tuple[str, str]]
-    ) -> dict[str, list[DEXQuote]]:
+    ) -> dict[str, DEXQuoteBatch]:
         """
         Fetch prices for all pairs from all DEXs using Multicall batching.
         Drastically reduces RPC calls/sec while maximizing throughput.
@@ -245,101 +572,91 @@ class DEXAggregator:
         if not self._initialized:
             await self.initialize()
         
-        results: dict[str, list[DEXQuote]] = {}
-        all_dexs = self._v2_dexs + self._v3_dexs + self._curve_dexs
+        # newHeads refreshes quote whatever was asked for last
+        self._watched_pairs = pairs
+        
+        # Every quote of this scan shares one timestamp
+        cycle_ts = time.time()
+        
+        # One row per DEX is enough for any pair
+        n_dexs = sum(len(dexs) for dexs in self._dexs_by_chain.values())
+        results: dict[str, DEXQuoteBatch] = defaultdict(lambda: DEXQuoteBatch(n_dexs))
         
-        # Group DEXs by chain
-        dexs_by_chain: dict[ChainId, list] = {}
-        for dex in all_dexs:
-            if dex.chain_id not in dexs_by_chain:
-                dexs_by_chain[dex.chain_id] = []
-            dexs_by_chain[dex.chain_id].append(dex)
-            
         async def process_chain(chain_id: ChainId, dexs: list):
-            try:
-                web3 = await rpc_manager.get_web3(chain_id)
-                multicall = Multicall(web3)
-                
-                batch_calls = []
-                # (base_addr, quote_addr, dex, sub_idx, amount, norm_symbol)
-                batch_meta = [] 
-                BATCH_SIZE = 200 # Conservative batch size
-                
-                async def execute_batch(current_calls, current_meta):
-                    if not current_calls: return
-                    try:
-                        raw_results = await multicall.aggregate(current_calls)
-                        for j, res in enumerate(raw_results):
-                            if res:
-                                b_addr, q_addr, d, idx, amt, norm = current_meta[j]
-                                price = d.process_multicall_result(res, b_addr, q_addr, amt, idx)
-                                if price:
-                                    # Convert DEXPrice to DEXQuote (normalize timestamp etc)
-                                    quote = DEXQuote(
-                                        dex_name=price.dex_name,
-                                        chain=price.chain,
-                                        chain_name=price.chain.name,
-                                        base_symbol=price.symbol.split('/')[0], # Rough parsing
-                                        quote_symbol=price.symbol.split('/')[1],
-                                        bid=price.effective_price, # Use effective price (post fee)
-                                        ask=price.effective_price * (1 + 0.001), # Add slight spread for ask?
-                                        fee_percent=price.fee_percent,
-                                        timestamp=time.time()
-                                    )
-                                    if norm not in results:
-                                        results[norm] = []
-                                    results[norm].append(quote)
-                    except Exception as e:
-                        logger.debug(f"Batch execution failed on {chain_id.name}: {e}")
-
-                for base, quote in pairs:
-                    tokens = self._get_token_pair_for_chain(chain_id, base, quote)
-                    if not tokens: continue
-                    
-                    base_token, quote_token = tokens
-                    base_addr = base_token.get_address(chain_id)
-                    quote_addr = quote_token.get_address(chain_id)
-                    
-                    # Calculate Amount
-                    decimals = base_token.get_decimals(chain_id)
-                    try:
-                        price_est = base_token.approx_price_usd or 0
-                        if price_est > 0:
-                            target_amount = DEFAULT_TRADE_SIZE_USD / price_est
-                        else:
-                            target_amount = 1.0
-                    except:
-                        target_amount = 1.0
-                        
-                    if target_amount < 0.000001: target_amount = 0.000001
-                    amount_in = int(target_amount * (10 ** decimals))
-                    if amount_in == 0: amount_in = 10**decimals
-                    
-                    normalized = f"{normalize_symbol(base)}/{normalize_symbol(quote)}"
-                    
-                    for dex in dexs:
-                        calls = dex.get_price_call_data(base_addr, quote_addr, amount_in)
-                        for i, call in enumerate(calls):
-                            batch_calls.append(call)
-                            batch_meta.append((base_addr, quote_addr, dex, i, amount_in, normalized))
-                            
-                            if len(batch_calls) >= BATCH_SIZE:
-                                await execute_batch(batch_calls, batch_meta)
-                                batch_calls = []
-                                batch_meta = []
-                
-                # Final batch
-                if batch_calls:
-                    await execute_batch(batch_calls, batch_meta)
-                    
-            except Exception as e:
-                logger.error(f"Multicall chain process failed {chain_id.name}: {e}")
-
-        # Run all chains
-        tasks = [process_chain(cid, dlist) for cid, dlist in dexs_by_chain.items()]
-        await asyncio.gather(*tasks)
+            if not CHAINS[chain_id].has_multicall3:
+                await self._fetch_chain_per_call(chain_id, dexs, pairs, results, cycle_ts)
+                return
+            
+            refresh = self._block_refreshes.get(chain_id)
+            if refresh is not None and not refresh.done():
+                # A newHeads refresh is already quoting this block; wait and read its cache
+                await asyncio.shield(refresh)
+            await self._fetch_chain_multicall(chain_id, dexs, pairs, results, cycle_ts)
+        
+        # Run all chains under one scan-wide deadline; quotes that landed in time are kept
+        tasks = [process_chain(cid, dlist) for cid, dlist in self._dexs_by_chain.items()]
+        try:
+            await asyncio.wait_for(asyncio.gather(*tasks), timeout=SCAN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"DEX scan hit the {SCAN_TIMEOUT:.0f}s deadline; returning partial quotes")
+        
+        if self._dead_pools_dirty:
+            self._dead_pools_dirty = False
+            await asyncio.to_thread(self._save_dead_pools, dict(self._dead_pools))
         
-        return results
+        return dict(results)
+    
+    async def _fetch_chain_per_call(
+        self,
+        chain_id: ChainId,
+        dexs: list,
+        pairs: list[tuple[str, str]],
+        results: dict[str, DEXQuoteBatch],
+        cycle_ts: float
+    ):
+        """Per-(pair, DEX) get_price path for chains without Multicall3"""
+        block_cache = await self._get_block_cache(chain_id)
+        jobs = []
+        for base, quote in pairs:
+            if not self._get_token_pair_for_chain(chain_id, base, quote):
+                continue
+            for dex in dexs:
+                key = (dex.name, base, quote)
+                if block_cache is not None and key in block_cache:
+                    # Already quoted in this block
+                    cached = block_cache[key]
+                    if cached:
+                        results[cached.normalized_symbol].append(_restamp(cached, cycle_ts))
+                    continue
+                jobs.append((base, quote, dex))
+        
+        # Each job writes its own result; nothing to post-process or type-check afterwards
+        await asyncio.gather(*(
+            self._fetch_into(results, block_cache, base, quote, chain_id, dex, cycle_ts)
+            for base, quote, dex in jobs
+        ))
+    
+    async def _fetch_into(
+        self,
+        results: dict[str, DEXQuoteBatch],
+        block_cache: Optional[dict],
+        base_symbol: str,
+        quote_symbol: str,
+        chain_id: ChainId,
+        dex,
+        cycle_ts: float
+    ):
+        """get_price() that stores its quote in `results` (and the block cache) itself"""
+        try:
+            quote = await self.get_price(base_symbol, quote_symbol, chain_id, dex, cycle_ts=cycle_ts)
+        except Exception as e:
+            # Anything get_price() doesn't expect (e.g. every endpoint down) lands here
+            logger.debug(f"{dex.name} quote {base_symbol}/{quote_symbol} failed: {e}")
+            return
+        if block_cache is not None:
+            block_cache[(dex.name, base_symbol, quote_symbol)] = quote
+        if quote:
+            results[quote.normalized_symbol].append(quote)
     
     def get_all_dexs(self) -> list[str]:
         """Get list of all DEX names"""
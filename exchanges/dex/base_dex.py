@@ -4,12 +4,25 @@ Base DEX class for all DEX implementations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Optional, Any
+import numpy as np
 
 from config.chains import ChainId
-from core.network.multicall import Call
+from config.tokens import get_token_symbol
+from core.network.multicall import Call, Multicall
 
 
-@dataclass
+# One quote per row, for consumers that compare prices with NumPy instead of looping over DEXPrice
+DEX_PRICE_DTYPE = np.dtype([
+    ("chain", "i4"),
+    ("dex", "U24"),
+    ("price", "f8"),
+    ("fee", "f8"),  # Percent, like DEXPrice.fee_percent
+    ("tok_in", "U42"),
+    ("tok_out", "U42"),
+])
+
+
+@dataclass(slots=True, frozen=True)
 class DEXPrice:
     """Price data from a DEX"""
     dex_name: str
@@ -25,6 +38,21 @@ class DEXPrice:
     def effective_price(self) -> float:
         """Price after DEX fees"""
         return self.price * (1 - self.fee_percent / 100)
+    
+    @classmethod
+    def from_row(cls, row: np.void) -> "DEXPrice":
+        """DEXPrice from one DEX_PRICE_DTYPE row, for callers that still want objects"""
+        chain = ChainId(int(row["chain"]))
+        token_in, token_out = str(row["tok_in"]), str(row["tok_out"])
+        return cls(
+            dex_name=str(row["dex"]),
+            chain=chain,
+            symbol=f"{get_token_symbol(chain, token_in)}/{get_token_symbol(chain, token_out)}",
+            token_in=token_in,
+            token_out=token_out,
+            price=float(row["price"]),
+            fee_percent=float(row["fee"])
+        )
 
 
 class BaseDEX(ABC):
@@ -68,6 +96,13 @@ class BaseDEX(ABC):
         """
         pass
     
+    async def prepare_contracts(self):
+        """
+        Async setup get_price_call_data() depends on (e.g. a contract object to encode against).
+        Awaited before batching; no-op for adapters that encode from raw selectors.
+        """
+        pass
+    
     @abstractmethod
     def get_price_call_data(
         self,
@@ -80,6 +115,61 @@ class BaseDEX(ABC):
         Does NOT execute network request.
         """
         pass
+    
+    @abstractmethod
+    def process_multicall_result(
+        self,
+        result: Any,
+        token_in: str,
+        token_out: str,
+        amount_in: int,
+        call_index: int = 0
+    ) -> Optional[DEXPrice]:
+        """
+        Decode one result of get_price_call_data() (call_index-th call).
+        Returns DEXPrice or None.
+        """
+        pass
+
+
+    async def resolve_pools(self, token_pairs: list[tuple[str, str]], multicall: Multicall):
+        """
+        Resolve and cache pool addresses that get_quote_bundle_calldata() needs,
+        batched through `multicall`. No-op for DEXs quoted through a router.
+        """
+        pass
+    
+    def get_quote_bundle_calldata(
+        self,
+        token_in: str,
+        token_out: str,
+        amount_in: int
+    ) -> list[Call]:
+        """
+        Every call needed for one quote (price and, where available, reserves),
+        so the whole quote costs a single multicall round-trip.
+        """
+        return self.get_price_call_data(token_in, token_out, amount_in)
+    
+    def process_quote_bundle(
+        self,
+        results: list[Any],
+        token_in: str,
+        token_out: str,
+        amount_in: int
+    ) -> tuple[Optional[tuple[int, int]], Optional[DEXPrice]]:
+        """
+        Decode a quote bundle into (reserves, best price).
+        Default: no reserves; best price across the price calls (e.g. V3 fee tiers).
+        """
+        best = None
+        for i, result in enumerate(results):
+            if not result:
+                continue
+            price = self.process_multicall_result(result, token_in, token_out, amount_in, i)
+            if price and (best is None or price.price > best.price):
+                best = price
+        return None, best
 
 
 # Standard Uniswap V2 ABI for Router and Factory
@@ -155,10 +245,18 @@ UNISWAP_V2_PAIR_ABI = [
 UNISWAP_V3_QUOTER_ABI = [
     {
         "inputs": [
-            {"internalType": "address", "name": "tokenIn", "type": "address"},
-            {"internalType": "address", "name": "tokenOut", "type": "address"},
-            {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
-            {"internalType": "uint24", "name": "fee", "type": "uint24"}
+            {
+                "components": [
+                    {"internalType": "address", "name": "tokenIn", "type": "address"},
+                    {"internalType": "address", "name": "tokenOut", "type": "address"},
+                    {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
+                    {"internalType": "uint24", "name": "fee", "type": "uint24"},
+                    {"internalType": "uint160", "name": "sqrtPriceLimitX96", "type": "uint160"}
+                ],
+                "internalType": "struct IQuoterV2.QuoteExactInputSingleParams",
+                "name": "params",
+                "type": "tuple"
+            }
         ],
         "name": "quoteExactInputSingle",
         "outputs": [
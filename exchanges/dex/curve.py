@@ -4,12 +4,15 @@ Uses the Curve Router to find best rates across pools.
 """
 from typing import Optional, Any
 from web3 import AsyncWeb3
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector
 
 from config.chains import ChainId, CHAINS
 from exchanges.dex.base_dex import BaseDEX, DEXPrice
 from utils.rpc_manager import rpc_manager
 from utils.rate_limiter import rate_limiter
 from utils.logger import get_logger
+from utils.addresses import checksum_address, ZERO_ADDRESS
 from core.network.multicall import Call
 
 logger = get_logger(__name__)
@@ -33,13 +36,15 @@ CURVE_ROUTER_ABI = [
     }
 ]
 
+GET_BEST_RATE_SELECTOR = function_signature_to_4byte_selector("get_best_rate(address,address,uint256)")
+
 class CurveDEX(BaseDEX):
     """
     Curve Finance Adapter using Router
     """
     def __init__(self, chain_id: ChainId, router_address: str):
         super().__init__(chain_id, "Curve")
-        self.router_address = router_address
+        self.router_address = checksum_address(router_address)
         self._web3: Optional[AsyncWeb3] = None
         self._router_contract = None
         self.fee_percent = 0.0004 # Approx 0.04% base fee, varies by pool
@@ -53,7 +58,7 @@ class CurveDEX(BaseDEX):
         if self._router_contract is None:
             web3 = await self._get_web3()
             self._router_contract = web3.eth.contract(
-                address=web3.to_checksum_address(self.router_address),
+                address=self.router_address,
                 abi=CURVE_ROUTER_ABI
             )
         return self._router_contract
@@ -67,18 +72,14 @@ class CurveDEX(BaseDEX):
         try:
             await rate_limiter.acquire(f"chain:{self.chain_id.name}")
             router = await self._get_router()
-            web3 = await self._get_web3()
             
-            t_in = web3.to_checksum_address(token_in)
-            t_out = web3.to_checksum_address(token_out)
-            
-            # call get_best_rate
-            result = await router.functions.get_best_rate(t_in, t_out, amount_in).call()
+            # Token addresses arrive checksummed from the Token config
+            result = await router.functions.get_best_rate(token_in, token_out, amount_in).call()
             # result is (pool_address, amount_out)
             
             pool_addr, amount_out = result
             
-            if amount_out == 0 or pool_addr == "0x0000000000000000000000000000000000000000":
+            if amount_out == 0 or pool_addr == ZERO_ADDRESS:
                 return None
                 
             price = amount_out / amount_in
@@ -110,21 +111,13 @@ class CurveDEX(BaseDEX):
         amount_in: int
     ) -> list[Call]:
         try:
-            if not self._router_contract:
-                 return []
-                 
-            t_in = AsyncWeb3.to_checksum_address(token_in)
-            t_out = AsyncWeb3.to_checksum_address(token_out)
-            
-            call_data = self._router_contract.encodeABI(
-                fn_name="get_best_rate",
-                args=[t_in, t_out, amount_in]
-            )
-            
+            # Encoded directly against the constant selector; no contract object needed
             return [Call(
                 target=self.router_address,
                 allow_failure=True,
-                call_data=bytes.fromhex(call_data[2:]),
+                call_data=GET_BEST_RATE_SELECTOR + encode(
+                    ['address', 'address', 'uint256'], [token_in, token_out, amount_in]
+                ),
                 output_types=['address', 'uint256']
             )]
         except Exception:
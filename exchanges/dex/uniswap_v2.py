@@ -2,22 +2,135 @@
 Uniswap V2 style DEX implementation
 Works for: Uniswap V2, SushiSwap, PancakeSwap V2, QuickSwap, Camelot, and more
 """
+import asyncio
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional, Any
+import numpy as np
 from web3 import AsyncWeb3
+from web3.contract import AsyncContract
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector
 
 from config.chains import ChainId, CHAINS
-from config.tokens import Token, ALL_TOKENS
+from config.tokens import Token, get_token_symbol
 from exchanges.dex.base_dex import (
-    BaseDEX, DEXPrice,
+    BaseDEX, DEXPrice, DEX_PRICE_DTYPE,
     UNISWAP_V2_ROUTER_ABI, UNISWAP_V2_PAIR_ABI, UNISWAP_V2_FACTORY_ABI
 )
 from utils.rpc_manager import rpc_manager
 from utils.rate_limiter import rate_limiter
 from utils.logger import get_logger
-from core.network.multicall import Call
+from utils.addresses import checksum_address, ZERO_ADDRESS
+from core.network.multicall import Call, Multicall
 
 logger = get_logger(__name__)
 
+# Raw selectors for pair/factory calls encoded without a contract object
+GET_PAIR_SELECTOR = function_signature_to_4byte_selector("getPair(address,address)")
+GET_RESERVES_SELECTOR = function_signature_to_4byte_selector("getReserves()")
+TOKEN0_SELECTOR = function_signature_to_4byte_selector("token0()")
+GET_AMOUNTS_OUT_SELECTOR = function_signature_to_4byte_selector("getAmountsOut(uint256,address[])")
+FACTORY_SELECTOR = function_signature_to_4byte_selector("factory()")
+
+# Factory / pair / token0 addresses never change on-chain, so they persist across restarts
+POOL_CACHE_FILE = Path("markets_cache") / "v2_pools.json"
+
+# "CHAIN/dex name" -> {"factory": addr, "pairs": {(tokA, tokB): pair}, "token0": {pair: token0}}
+# Instances hold references into this, so saving it captures their latest lookups.
+# Pair keys are canonical tuples in memory and "tokA-tokB" strings on disk.
+_pool_store: Optional[dict[str, dict[str, Any]]] = None
+_pool_store_dirty = False
+_pool_store_saving = False
+
+
+def _pair_key(token_a: str, token_b: str) -> tuple[str, str]:
+    """Order-independent pair key, sorted like the V2 token0 < token1 invariant"""
+    return (token_a, token_b) if token_a.lower() < token_b.lower() else (token_b, token_a)
+
+
+def _get_pool_store() -> dict[str, dict[str, Any]]:
+    """Load the on-disk pool store once (empty on any problem)"""
+    global _pool_store
+    if _pool_store is None:
+        try:
+            _pool_store = json.loads(POOL_CACHE_FILE.read_text())
+            for entry in _pool_store.values():
+                entry["pairs"] = {_pair_key(*key.split("-")): pair for key, pair in entry["pairs"].items()}
+        except Exception:
+            _pool_store = {}
+    return _pool_store
+
+
+def _dump_pool_store() -> str:
+    return json.dumps({
+        name: {**entry, "pairs": {"-".join(key): pair for key, pair in entry["pairs"].items()}}
+        for name, entry in _pool_store.items()
+    })
+
+
+def _write_pool_store(text: str):
+    try:
+        POOL_CACHE_FILE.parent.mkdir(exist_ok=True)
+        tmp = POOL_CACHE_FILE.with_suffix(".tmp")
+        tmp.write_text(text)
+        tmp.replace(POOL_CACHE_FILE)
+    except Exception as e:
+        logger.debug(f"Could not write V2 pool cache: {e}")
+
+
+async def _flush_pool_store():
+    """Write the pool store if it changed; one writer at a time, later changes caught by its loop"""
+    global _pool_store_dirty, _pool_store_saving
+    if _pool_store_saving:
+        return
+    _pool_store_saving = True
+    try:
+        while _pool_store_dirty:
+            _pool_store_dirty = False
+            # Serialize on the loop (dicts may change); only the file write goes to a thread
+            await asyncio.to_thread(_write_pool_store, _dump_pool_store())
+    finally:
+        _pool_store_saving = False
+
+
+def _mark_pool_store_dirty():
+    global _pool_store_dirty
+    _pool_store_dirty = True
+
+
+
+# (base, quote) -> "BASE/QUOTE", so quotes share one string per pair instead of formatting it each time
+_SYMBOL_PAIR_CACHE: dict[tuple[str, str], str] = {}
+
+
+def _pair_symbol(base: str, quote: str) -> str:
+    symbol = _SYMBOL_PAIR_CACHE.get((base, quote))
+    if symbol is None:
+        symbol = _SYMBOL_PAIR_CACHE[(base, quote)] = f"{base}/{quote}"
+    return symbol
+
+
+@lru_cache(maxsize=1024)
+def _amounts_out_tail(token_in: str, token_out: str) -> bytes:
+    """
+    getAmountsOut calldata after the amountIn word (path offset, length, addresses).
+    Keyed by pair only: probe amounts follow live prices and rarely repeat, so they're spliced in per call.
+    """
+    return encode(['uint256', 'address[]'], [0, [token_in, token_out]])[32:]
+
+
+def _amounts_out_call(router: str, token_in: str, token_out: str, amount_in: int) -> Call:
+    """getAmountsOut(uint256 amountIn, address[] path) call; amountIn is the first argument word"""
+    return Call(
+        target=router,
+        allow_failure=True,
+        call_data=GET_AMOUNTS_OUT_SELECTOR + int(amount_in).to_bytes(32, "big") + _amounts_out_tail(token_in, token_out),
+        output_types=['uint256[]']
+    )
+
 
 class UniswapV2DEX(BaseDEX):
     """
@@ -25,6 +138,11 @@ class UniswapV2DEX(BaseDEX):
     Uses the getAmountsOut function for price quotes
     """
     
+    # Shared by every instance on the same router; keyed (chain_id, checksummed router)
+    _router_registry: dict[tuple[ChainId, str], AsyncContract] = {}
+    _factory_registry: dict[tuple[ChainId, str], str] = {}
+    _factory_lookups: dict[tuple[ChainId, str], asyncio.Task] = {}  # In-flight factory() calls
+    
     def __init__(
         self,
         chain_id: ChainId,
@@ -33,39 +151,66 @@ class UniswapV2DEX(BaseDEX):
         fee_percent: float = 0.3
     ):
         super().__init__(chain_id, name)
-        self.router_address = router_address
+        self.router_address = checksum_address(router_address)  # Once, so call building is pure CPU
         self.fee_percent = fee_percent
-        self._factory_address: Optional[str] = None
-        self._web3: Optional[AsyncWeb3] = None
-        self._router_contract = None
+        self._registry_key = (chain_id, self.router_address)
         
-        # Caches to reduce RPC calls
-        self._pair_cache: dict[str, str] = {}  # "tokenA-tokenB" -> pair_address
-        self._token0_cache: dict[str, str] = {}  # pair_address -> token0_address
+        # Caches to reduce RPC calls, warm-started from POOL_CACHE_FILE
+        self._pool_entry = _get_pool_store().setdefault(
+            f"{chain_id.name}/{name}", {"factory": None, "pairs": {}, "token0": {}}
+        )
+        self._factory_address: Optional[str] = self._pool_entry.get("factory")
+        if self._factory_address is not None:
+            self._factory_registry.setdefault(self._registry_key, self._factory_address)
+        self._pair_cache: dict[tuple[str, str], str] = self._pool_entry["pairs"]  # _pair_key -> pair_address
+        self._token0_cache: dict[str, str] = self._pool_entry["token0"]  # pair_address -> token0_address
+        # pair_address -> (reserve0, reserve1, block, monotonic fetch time); valid for one block
+        self._reserves_cache: dict[str, tuple[int, int, Optional[int], float]] = {}
+        # Not persisted: a missing pair can be created later
+        self._no_pair: set[tuple[str, str]] = set()  # _pair_keys the factory has no pair for
     
     async def _get_web3(self) -> AsyncWeb3:
-        """Get Web3 instance"""
-        if self._web3 is None:
-            self._web3 = await rpc_manager.get_web3(self.chain_id)
-        return self._web3
+        """Chain-wide Web3 from rpc_manager; not pinned per instance so failover applies to every DEX"""
+        return await rpc_manager.get_web3(self.chain_id)
     
     async def _get_router(self):
-        """Get router contract"""
-        if self._router_contract is None:
-            web3 = await self._get_web3()
-            self._router_contract = web3.eth.contract(
-                address=web3.to_checksum_address(self.router_address),
+        """Get router contract (rebuilt if the chain's endpoint changed since it was bound)"""
+        web3 = await self._get_web3()
+        router = self._router_registry.get(self._registry_key)
+        if router is None or router.w3 is not web3:
+            router = self._router_registry[self._registry_key] = web3.eth.contract(
+                address=self.router_address,
                 abi=UNISWAP_V2_ROUTER_ABI
             )
-        return self._router_contract
+        return router
     
     async def _get_factory_address(self) -> str:
-        """Get factory address from router"""
+        """Get factory address from router (raw factory() call; no contract object needed)"""
         if self._factory_address is None:
-            router = await self._get_router()
-            self._factory_address = await router.functions.factory().call()
+            key = self._registry_key
+            factory = self._factory_registry.get(key)
+            if factory is None:
+                # Concurrent first callers on the same router share one factory() call
+                lookup = self._factory_lookups.get(key)
+                if lookup is None:
+                    lookup = self._factory_lookups[key] = asyncio.create_task(self._call_factory())
+                try:
+                    factory = await asyncio.shield(lookup)
+                finally:
+                    if lookup.done() and self._factory_lookups.get(key) is lookup:
+                        del self._factory_lookups[key]
+                self._factory_registry[key] = factory
+            self._factory_address = self._pool_entry["factory"] = factory
+            _mark_pool_store_dirty()
         return self._factory_address
     
+    async def _call_factory(self) -> str:
+        """Raw factory() call on the router"""
+        web3 = await self._get_web3()
+        raw = await web3.eth.call({"to": self.router_address, "data": FACTORY_SELECTOR})
+        (factory,) = decode(['address'], bytes(raw))
+        return checksum_address(factory)
+    
     async def get_price(
         self,
         token_in: str,
@@ -73,15 +218,22 @@ class UniswapV2DEX(BaseDEX):
         amount_in: int
     ) -> Optional[DEXPrice]:
         """Get price for a swap using getAmountsOut"""
+        await rate_limiter.acquire(f"chain:{self.chain_id.name}")
+        return await self._get_price_unmetered(token_in, token_out, amount_in)
+    
+    async def _get_price_unmetered(
+        self,
+        token_in: str,
+        token_out: str,
+        amount_in: int
+    ) -> Optional[DEXPrice]:
+        """get_price body; the caller has already debited the chain's rate limiter"""
         try:
-            await rate_limiter.acquire(f"chain:{self.chain_id.name}")
-            
-            web3 = await self._get_web3()
             router = await self._get_router()
             
             # Checksum addresses
-            token_in = web3.to_checksum_address(token_in)
-            token_out = web3.to_checksum_address(token_out)
+            token_in = checksum_address(token_in)
+            token_out = checksum_address(token_out)
             
             # Get amounts out
             path = [token_in, token_out]
@@ -91,21 +243,7 @@ class UniswapV2DEX(BaseDEX):
                 return None
             
             # Calculate price (amount_out / amount_in)
-            price = amounts[1] / amount_in
-            
-            # Find token symbols
-            token_in_symbol = self._get_token_symbol(token_in)
-            token_out_symbol = self._get_token_symbol(token_out)
-            
-            return DEXPrice(
-                dex_name=self.name,
-                chain=self.chain_id,
-                symbol=f"{token_in_symbol}/{token_out_symbol}",
-                token_in=token_in,
-                token_out=token_out,
-                price=price,
-                fee_percent=self.fee_percent
-            )
+            return self._make_price(token_in, token_out, amounts[1] / amount_in)
             
         except Exception as e:
             logger.debug(f"Failed to get price from {self.name}: {e}")
@@ -120,49 +258,53 @@ class UniswapV2DEX(BaseDEX):
         try:
             # Normalize addresses
             web3 = await self._get_web3()
-            token_a = web3.to_checksum_address(token_a)
-            token_b = web3.to_checksum_address(token_b)
+            token_a = checksum_address(token_a)
+            token_b = checksum_address(token_b)
             
             # 1. Check Pair Cache
-            pair_key = f"{token_a}-{token_b}"
-            pair_key_rev = f"{token_b}-{token_a}"
+            pair_key = _pair_key(token_a, token_b)
+            pair_address = self._pair_cache.get(pair_key)
             
-            if pair_key in self._pair_cache:
-                pair_address = self._pair_cache[pair_key]
-            elif pair_key_rev in self._pair_cache:
-                pair_address = self._pair_cache[pair_key_rev]
-            else:
+            if pair_key in self._no_pair:
+                return None
+            elif pair_address is None:
                 # Fetch from factory
                 await rate_limiter.acquire(f"chain:{self.chain_id.name}")
                 factory_address = await self._get_factory_address()
                 factory = web3.eth.contract(
-                    address=web3.to_checksum_address(factory_address),
+                    address=checksum_address(factory_address),
                     abi=UNISWAP_V2_FACTORY_ABI
                 )
                 pair_address = await factory.functions.getPair(token_a, token_b).call()
                 
-                if pair_address == "0x0000000000000000000000000000000000000000":
+                if pair_address == ZERO_ADDRESS:
+                    self._no_pair.add(pair_key)
                     return None
                 
                 # Cache it
                 self._pair_cache[pair_key] = pair_address
+                _mark_pool_store_dirty()
             
-            # Get pair contract
-            pair = web3.eth.contract(
-                address=pair_address,
-                abi=UNISWAP_V2_PAIR_ABI
-            )
+            # 2. Get Reserves (once per block) and token0 (only if not cached) concurrently
+            token0 = self._token0_cache.get(pair_address)
+            reserves = self._get_cached_reserves(pair_address)
+            if reserves is None or token0 is None:
+                pair = web3.eth.contract(
+                    address=pair_address,
+                    abi=UNISWAP_V2_PAIR_ABI
+                )
+                await rate_limiter.acquire_many(f"chain:{self.chain_id.name}", 1 if token0 else 2)
+                calls = [pair.functions.getReserves().call()]
+                if token0 is None:
+                    calls.append(pair.functions.token0().call())
+                reserves, *rest = await asyncio.gather(*calls)
+                self._cache_reserves(pair_address, reserves[0], reserves[1])
             
-            # 2. Get Reserves (Always fresh)
-            await rate_limiter.acquire(f"chain:{self.chain_id.name}")
-            reserves = await pair.functions.getReserves().call()
-            
-            # 3. Check Token0 Cache
-            if pair_address in self._token0_cache:
-                token0 = self._token0_cache[pair_address]
-            else:
-                token0 = await pair.functions.token0().call()
-                self._token0_cache[pair_address] = token0
+            # 3. Fill Token0 Cache
+            if token0 is None:
+                token0 = self._token0_cache[pair_address] = rest[0]
+                _mark_pool_store_dirty()
+                await _flush_pool_store()
             
             # Order reserves correctly
             if token0.lower() == token_a.lower():
@@ -174,14 +316,131 @@ class UniswapV2DEX(BaseDEX):
             logger.debug(f"Failed to get reserves for {token_a}-{token_b} on {self.name}: {e}")
             return None
     
+    def _get_cached_reserves(self, pair_address: str) -> Optional[tuple[int, int]]:
+        """
+        Raw (reserve0, reserve1) if still current: same block as the newHeads stream,
+        or younger than one block time when the chain isn't streaming heads
+        """
+        cached = self._reserves_cache.get(pair_address)
+        if cached is None:
+            return None
+        reserve0, reserve1, block, fetched_at = cached
+        head = rpc_manager.head_block(self.chain_id)
+        if head is not None:
+            fresh = block == head
+        else:
+            fresh = time.monotonic() - fetched_at < CHAINS[self.chain_id].avg_block_time
+        return (reserve0, reserve1) if fresh else None
+    
+    def _cache_reserves(self, pair_address: str, reserve0: int, reserve1: int):
+        self._reserves_cache[pair_address] = (
+            reserve0, reserve1, rpc_manager.head_block(self.chain_id), time.monotonic()
+        )
+    
+    def _get_cached_pair(self, token_a: str, token_b: str) -> Optional[str]:
+        """Pair address from cache (either token order), None if unknown"""
+        return self._pair_cache.get(_pair_key(token_a, token_b))
+    
+    async def resolve_pools(self, token_pairs: list[tuple[str, str]], multicall: Multicall):
+        """Batch getPair + token0 lookups for pairs not cached yet"""
+        todo: dict[tuple[str, str], None] = {}  # Ordered, de-duplicated _pair_keys
+        for token_a, token_b in token_pairs:
+            token_a = checksum_address(token_a)
+            token_b = checksum_address(token_b)
+            pair_key = _pair_key(token_a, token_b)
+            if pair_key in self._pair_cache or pair_key in self._no_pair:
+                continue
+            todo[pair_key] = None
+        
+        if todo:
+            factory_address = await self._get_factory_address()
+            calls = [
+                Call(
+                    target=factory_address,
+                    allow_failure=True,
+                    call_data=GET_PAIR_SELECTOR + encode(['address', 'address'], [token_a, token_b]),
+                    output_types=['address']
+                )
+                for token_a, token_b in todo
+            ]
+            await rate_limiter.acquire(f"chain:{self.chain_id.name}")
+            results = await multicall.aggregate(calls)
+            for pair_key, pair_address in zip(todo, results):
+                if pair_address is None:
+                    continue  # Call failed, retry on next scan
+                if pair_address == ZERO_ADDRESS:
+                    self._no_pair.add(pair_key)
+                else:
+                    self._pair_cache[pair_key] = checksum_address(pair_address)
+                    _mark_pool_store_dirty()
+        
+        # token0 is needed to orient reserves
+        missing = [p for p in set(self._pair_cache.values()) if p not in self._token0_cache]
+        if missing:
+            calls = [
+                Call(target=pair, allow_failure=True, call_data=TOKEN0_SELECTOR, output_types=['address'])
+                for pair in missing
+            ]
+            await rate_limiter.acquire(f"chain:{self.chain_id.name}")
+            results = await multicall.aggregate(calls)
+            for pair, token0 in zip(missing, results):
+                if token0:
+                    self._token0_cache[pair] = checksum_address(token0)
+                    _mark_pool_store_dirty()
+        
+        await _flush_pool_store()
+    
+    def get_quote_bundle_calldata(
+        self,
+        token_in: str,
+        token_out: str,
+        amount_in: int
+    ) -> list[Call]:
+        """getAmountsOut plus getReserves on the pair (when resolved) in one bundle"""
+        calls = self.get_price_call_data(token_in, token_out, amount_in)
+        if not calls:
+            return calls
+        
+        pair = self._get_cached_pair(
+            checksum_address(token_in),
+            checksum_address(token_out)
+        )
+        if pair and pair in self._token0_cache:
+            calls.append(Call(
+                target=pair,
+                allow_failure=True,
+                call_data=GET_RESERVES_SELECTOR,
+                output_types=['uint112', 'uint112', 'uint32']
+            ))
+        return calls
+    
+    def process_quote_bundle(
+        self,
+        results: list[Any],
+        token_in: str,
+        token_out: str,
+        amount_in: int
+    ) -> tuple[Optional[tuple[int, int]], Optional[DEXPrice]]:
+        """Decode (reserves ordered as token_in/token_out, price) from a V2 bundle"""
+        price = None
+        if results and results[0]:
+            price = self.process_multicall_result(results[0], token_in, token_out, amount_in, 0)
+        
+        reserves = None
+        if len(results) > 1 and results[1]:
+            reserve0, reserve1, _ = results[1]
+            token_in = checksum_address(token_in)
+            pair = self._get_cached_pair(token_in, checksum_address(token_out))
+            token0 = self._token0_cache.get(pair)
+            if token0:
+                self._cache_reserves(pair, reserve0, reserve1)
+                reserves = (reserve0, reserve1) if token0 == token_in else (reserve1, reserve0)
+        
+        return reserves, price
+    
     def _get_token_symbol(self, address: str) -> str:
-        """Get token symbol from address"""
-        address_lower = address.lower()
-        for token in ALL_TOKENS:
-            token_addr = token.get_address(self.chain_id)
-            if token_addr and token_addr.lower() == address_lower:
-                return token.symbol
-        return address[:8] + "..."
+        """Get token symbol from address (O(1) per-chain index)"""
+        return get_token_symbol(self.chain_id, address)
 
     def get_price_call_data(
         self,
@@ -191,39 +450,7 @@ class UniswapV2DEX(BaseDEX):
     ) -> list[Call]:
         """Get call data for multicall"""
         try:
-            # We need the Web3 instance to checksum addresses, but this method shouldn't be async
-            # So we assume addresses are valid or handle normalization later?
-            # Ideally we check correct format here.
-            token_in = AsyncWeb3.to_checksum_address(token_in)
-            token_out = AsyncWeb3.to_checksum_address(token_out)
-            
-            # Encode call data manually or use contract helper if available sync?
-            # Web3.py contract functions usually require an instance.
-            # We can construct the calldata manually using ABI encoding.
-            # getAmountsOut(uint256 amountIn, address[] path)
-            
-            # Selector for getAmountsOut: 0xd06ca61f
-            # But relying on web3 contract encodeABI is safer.
-            
-            # Since we can't easily get the contract instance synchronously without async init,
-            # we'll do a lightweight encoding manually or accept that we need to init first.
-            # BUT: This method is called by aggregator which manages init.
-            
-            if not self._router_contract:
-                return [] # Interface restriction: must be governed by aggregator
-                
-            path = [token_in, token_out]
-            call_data = self._router_contract.encodeABI(
-                fn_name="getAmountsOut",
-                args=[amount_in, path]
-            )
-            
-            return [Call(
-                target=self.router_address,
-                allow_failure=True,
-                call_data=bytes.fromhex(call_data[2:]), # remove 0x prefix
-                output_types=['uint256[]']
-            )]
+            return [_amounts_out_call(self.router_address, token_in, token_out, amount_in)]
         except Exception as e:
             logger.error(f"Failed to encode call data: {e}")
             return []
@@ -251,193 +478,206 @@ class UniswapV2DEX(BaseDEX):
             # But let's be careful. My Multicall wrapper unwraps single values.
             # If output_types=['uint256[]'], result is [123, 456] (list of int)
             
-            amounts = result
-            if isinstance(result, tuple):
-                 amounts = result[0]
-            
-            if not isinstance(amounts, list) or len(amounts) < 2:
-                 return None
-
-            amount_out = amounts[1]
-            if amount_out == 0:
+            amount_out = _amount_out(result)
+            if not amount_out:
                 return None
-                
-            price = amount_out / amount_in
             
-            token_in_symbol = self._get_token_symbol(token_in)
-            token_out_symbol = self._get_token_symbol(token_out)
-            
-            return DEXPrice(
-                dex_name=self.name,
-                chain=self.chain_id,
-                symbol=f"{token_in_symbol}/{token_out_symbol}",
-                token_in=token_in,
-                token_out=token_out,
-                price=price,
-                fee_percent=self.fee_percent
-            )
+            return self._make_price(token_in, token_out, amount_out / amount_in)
         except Exception:
             return None
+    
+    def _make_price(self, token_in: str, token_out: str, price: float) -> DEXPrice:
+        """DEXPrice for a getAmountsOut quote"""
+        return DEXPrice(
+            dex_name=self.name,
+            chain=self.chain_id,
+            symbol=_pair_symbol(self._get_token_symbol(token_in), self._get_token_symbol(token_out)),
+            token_in=token_in,
+            token_out=token_out,
+            price=price,
+            fee_percent=self.fee_percent
+        )
 
 
-def create_dex_instances() -> list[UniswapV2DEX]:
-    """Create DEX instances for all supported chains"""
-    instances = []
-    
-    # Ethereum DEXs
-    eth_config = CHAINS[ChainId.ETHEREUM]
-    if "uniswap_v2" in eth_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.ETHEREUM, "Uniswap V2", eth_config.dex_routers["uniswap_v2"], 0.3
-        ))
-    if "sushiswap" in eth_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.ETHEREUM, "SushiSwap (ETH)", eth_config.dex_routers["sushiswap"], 0.3
-        ))
-    
-    # BSC DEXs
-    bsc_config = CHAINS[ChainId.BSC]
-    if "pancakeswap_v2" in bsc_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.BSC, "PancakeSwap V2", bsc_config.dex_routers["pancakeswap_v2"], 0.25
-        ))
-    if "biswap" in bsc_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.BSC, "BiSwap", bsc_config.dex_routers["biswap"], 0.1
-        ))
-    
-    # Polygon DEXs
-    polygon_config = CHAINS[ChainId.POLYGON]
-    if "quickswap" in polygon_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.POLYGON, "QuickSwap", polygon_config.dex_routers["quickswap"], 0.3
-        ))
-    if "sushiswap" in polygon_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.POLYGON, "SushiSwap (Polygon)", polygon_config.dex_routers["sushiswap"], 0.3
-        ))
-    
-    # Arbitrum DEXs
-    arb_config = CHAINS[ChainId.ARBITRUM]
-    if "camelot" in arb_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.ARBITRUM, "Camelot", arb_config.dex_routers["camelot"], 0.3
-        ))
-    if "sushiswap" in arb_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.ARBITRUM, "SushiSwap (Arbitrum)", arb_config.dex_routers["sushiswap"], 0.3
-        ))
-    
-    # Optimism DEXs
-    op_config = CHAINS[ChainId.OPTIMISM]
-    if "velodrome" in op_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.OPTIMISM, "Velodrome", op_config.dex_routers["velodrome"], 0.02
-        ))
-    
-    # Avalanche DEXs
-    avax_config = CHAINS[ChainId.AVALANCHE]
-    if "traderjoe" in avax_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.AVALANCHE, "TraderJoe", avax_config.dex_routers["traderjoe"], 0.3
-        ))
-    if "pangolin" in avax_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.AVALANCHE, "Pangolin", avax_config.dex_routers["pangolin"], 0.3
-        ))
-    
-    # Fantom DEXs
-    ftm_config = CHAINS[ChainId.FANTOM]
-    if "spookyswap" in ftm_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.FANTOM, "SpookySwap", ftm_config.dex_routers["spookyswap"], 0.2
-        ))
-    if "spiritswap" in ftm_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.FANTOM, "SpiritSwap", ftm_config.dex_routers["spiritswap"], 0.3
-        ))
-    
-    # Base DEXs
-    base_config = CHAINS[ChainId.BASE]
-    if "aerodrome" in base_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.BASE, "Aerodrome", base_config.dex_routers["aerodrome"], 0.02
-        ))
-    if "baseswap" in base_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.BASE, "BaseSwap", base_config.dex_routers["baseswap"], 0.25
-        ))
-    
-    # zkSync DEXs
-    zksync_config = CHAINS[ChainId.ZKSYNC]
-    if "syncswap" in zksync_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.ZKSYNC, "SyncSwap (zkSync)", zksync_config.dex_routers["syncswap"], 0.3
-        ))
-    if "mute" in zksync_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.ZKSYNC, "Mute.io", zksync_config.dex_routers["mute"], 0.3
-        ))
-    
-    # Linea DEXs
-    linea_config = CHAINS[ChainId.LINEA]
-    if "syncswap" in linea_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.LINEA, "SyncSwap (Linea)", linea_config.dex_routers["syncswap"], 0.3
-        ))
-    
-    # Scroll DEXs
-    scroll_config = CHAINS[ChainId.SCROLL]
-    if "syncswap" in scroll_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.SCROLL, "SyncSwap (Scroll)", scroll_config.dex_routers["syncswap"], 0.3
-        ))
-    
-    # Gnosis DEXs
-    gnosis_config = CHAINS[ChainId.GNOSIS]
-    if "sushiswap" in gnosis_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.GNOSIS, "SushiSwap (Gnosis)", gnosis_config.dex_routers["sushiswap"], 0.3
-        ))
-    if "honeyswap" in gnosis_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.GNOSIS, "Honeyswap", gnosis_config.dex_routers["honeyswap"], 0.3
-        ))
+def _amount_out(result: Any) -> Optional[int]:
+    """amounts[1] from a decoded getAmountsOut result, None if malformed"""
+    # eth_abi decodes uint256[] as a tuple; unwrap only if still nested ((in, out),)
+    amounts = result
+    if isinstance(amounts, tuple) and amounts and isinstance(amounts[0], (list, tuple)):
+        amounts = amounts[0]
+    if not isinstance(amounts, (list, tuple)) or len(amounts) < 2:
+        return None
+    return amounts[1]
+
+
+async def quote_many(
+    chain_id: ChainId,
+    requests: list[tuple[UniswapV2DEX, str, str, int]],
+    multicall: Optional[Multicall] = None
+) -> list[Optional[DEXPrice]]:
+    """
+    Quote many (dex, token_in, token_out, amount_in) getAmountsOut requests on one chain
+    with a single Multicall3 aggregate3 call and one rate-limiter token.
+    Results line up with `requests`; None where a router reverted or returned nothing.
+    """
+    results: list[Optional[DEXPrice]] = [None] * len(requests)
+    quoted, prices = await _quote_prices(chain_id, requests, multicall)
+    for i, price in zip(quoted, prices.tolist()):
+        dex, token_in, token_out, _ = requests[i]
+        results[i] = dex._make_price(token_in, token_out, price)
+    return results
+
+
+async def _quote_prices(
+    chain_id: ChainId,
+    requests: list[tuple[UniswapV2DEX, str, str, int]],
+    multicall: Optional[Multicall] = None
+) -> tuple[list[int], np.ndarray]:
+    """quote_many core: (indices of requests that got a quote, their prices), no DEXPrice built"""
+    calls: list[Call] = []
+    spans: list[tuple[int, int]] = []  # (first call index, call count) per request
+    for dex, token_in, token_out, amount_in in requests:
+        dex_calls = dex.get_price_call_data(token_in, token_out, amount_in)
+        spans.append((len(calls), len(dex_calls)))
+        calls.extend(dex_calls)
+    if not calls:
+        return [], np.empty(0)
     
-    # Cronos DEXs
-    cronos_config = CHAINS[ChainId.CRONOS]
-    if "vvs" in cronos_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.CRONOS, "VVS Finance", cronos_config.dex_routers["vvs"], 0.3
-        ))
-    if "mmf" in cronos_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.CRONOS, "MM.Finance", cronos_config.dex_routers["mmf"], 0.17
-        ))
-        
-    # Moonbeam DEXs
-    moonbeam_config = CHAINS[ChainId.MOONBEAM]
-    if "stellaswap" in moonbeam_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.MOONBEAM, "StellaSwap", moonbeam_config.dex_routers["stellaswap"], 0.25
-        ))
-    if "beamswap" in moonbeam_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.MOONBEAM, "BeamSwap", moonbeam_config.dex_routers["beamswap"], 0.3
-        ))
+    if multicall is None:
+        multicall = Multicall(await rpc_manager.get_web3(chain_id))
+    await rate_limiter.acquire(f"chain:{chain_id.name}")
+    raw = await multicall.aggregate(calls)
     
-    # Celo DEXs
-    celo_config = CHAINS[ChainId.CELO]
-    if "ubeswap" in celo_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.CELO, "Ubeswap", celo_config.dex_routers["ubeswap"], 0.3
-        ))
+    # Decode amounts, then divide the whole batch in one vectorized pass.
+    # float() first: 256-bit amounts can overflow every NumPy integer dtype.
+    amounts_out = [_amount_out(raw[start]) if count and raw[start] else None for start, count in spans]
+    quoted = [i for i, amount_out in enumerate(amounts_out) if amount_out]
+    prices = (
+        np.fromiter((float(amounts_out[i]) for i in quoted), dtype=np.float64, count=len(quoted))
+        / np.fromiter((float(requests[i][3]) for i in quoted), dtype=np.float64, count=len(quoted))
+    )
+    return quoted, prices
+
+
+async def gather_prices(
+    chain_id: ChainId,
+    pairs: list[tuple[str, str]],
+    amount_in: int
+) -> list[Optional[DEXPrice]]:
+    """
+    Quote every (token_in, token_out) pair on every V2 DEX of one chain at once.
+    Multicall3 chains go through quote_many (one aggregate3 call); elsewhere all getAmountsOut
+    calls fly concurrently behind a single rate-limiter debit.
+    Results are ordered DEX-major, then pair.
+    """
+    requests = [
+        (dex, token_in, token_out, amount_in)
+        for dex in create_dex_instances() if dex.chain_id == chain_id
+        for token_in, token_out in pairs
+    ]
+    if not requests:
+        return []
+    if CHAINS[chain_id].has_multicall3:
+        return await quote_many(chain_id, requests)
     
-    # Kava DEXs
-    kava_config = CHAINS[ChainId.KAVA]
-    if "equilibre" in kava_config.dex_routers:
-        instances.append(UniswapV2DEX(
-            ChainId.KAVA, "Equilibre", kava_config.dex_routers["equilibre"], 0.05
-        ))
+    await rate_limiter.acquire_many(f"chain:{chain_id.name}", len(requests))
+    results = await asyncio.gather(
+        *(dex._get_price_unmetered(token_in, token_out, amount) for dex, token_in, token_out, amount in requests),
+        return_exceptions=True
+    )
+    return [None if isinstance(result, BaseException) else result for result in results]
+
+
+async def gather_prices_array(
+    chain_id: ChainId,
+    pairs: list[tuple[str, str]],
+    amount_in: int
+) -> np.ndarray:
+    """
+    gather_prices as a DEX_PRICE_DTYPE structured array, one row per successful quote.
+    On Multicall3 chains no DEXPrice objects are created at all; DEXPrice.from_row converts back.
+    """
+    if CHAINS[chain_id].has_multicall3:
+        requests = [
+            (dex, checksum_address(token_in), checksum_address(token_out), amount_in)
+            for dex in create_dex_instances() if dex.chain_id == chain_id
+            for token_in, token_out in pairs
+        ]
+        quoted, prices = await _quote_prices(chain_id, requests)
+        quotes = [requests[i][:3] for i in quoted]  # (dex, token_in, token_out)
+    else:
+        results = [q for q in await gather_prices(chain_id, pairs, amount_in) if q is not None]
+        prices = [q.price for q in results]
+        # Instance names are unique per chain
+        dexs = {dex.name: dex for dex in create_dex_instances() if dex.chain_id == chain_id}
+        quotes = [(dexs[q.dex_name], q.token_in, q.token_out) for q in results]
     
-    return instances
+    rows = np.empty(len(quotes), dtype=DEX_PRICE_DTYPE)
+    rows["chain"] = chain_id.value
+    rows["dex"] = [dex.name for dex, _, _ in quotes]
+    rows["price"] = prices
+    rows["fee"] = [dex.fee_percent for dex, _, _ in quotes]
+    rows["tok_in"] = [token_in for _, token_in, _ in quotes]
+    rows["tok_out"] = [token_out for _, _, token_out in quotes]
+    return rows
+
+
+# (chain, dex_routers key, display name, fee %); rows whose router isn't configured are skipped
+_DEX_TABLE: list[tuple[ChainId, str, str, float]] = [
+    (ChainId.ETHEREUM, "uniswap_v2", "Uniswap V2", 0.3),
+    (ChainId.ETHEREUM, "sushiswap", "SushiSwap (ETH)", 0.3),
+
+    (ChainId.BSC, "pancakeswap_v2", "PancakeSwap V2", 0.25),
+    (ChainId.BSC, "biswap", "BiSwap", 0.1),
+
+    (ChainId.POLYGON, "quickswap", "QuickSwap", 0.3),
+    (ChainId.POLYGON, "sushiswap", "SushiSwap (Polygon)", 0.3),
+
+    (ChainId.ARBITRUM, "camelot", "Camelot", 0.3),
+    (ChainId.ARBITRUM, "sushiswap", "SushiSwap (Arbitrum)", 0.3),
+
+    (ChainId.OPTIMISM, "velodrome", "Velodrome", 0.02),
+
+    (ChainId.AVALANCHE, "traderjoe", "TraderJoe", 0.3),
+    (ChainId.AVALANCHE, "pangolin", "Pangolin", 0.3),
+
+    (ChainId.FANTOM, "spookyswap", "SpookySwap", 0.2),
+    (ChainId.FANTOM, "spiritswap", "SpiritSwap", 0.3),
+
+    (ChainId.BASE, "aerodrome", "Aerodrome", 0.02),
+    (ChainId.BASE, "baseswap", "BaseSwap", 0.25),
+
+    (ChainId.ZKSYNC, "syncswap", "SyncSwap (zkSync)", 0.3),
+    (ChainId.ZKSYNC, "mute", "Mute.io", 0.3),
+
+    (ChainId.LINEA, "syncswap", "SyncSwap (Linea)", 0.3),
+
+    (ChainId.SCROLL, "syncswap", "SyncSwap (Scroll)", 0.3),
+
+    (ChainId.GNOSIS, "sushiswap", "SushiSwap (Gnosis)", 0.3),
+    (ChainId.GNOSIS, "honeyswap", "Honeyswap", 0.3),
+
+    (ChainId.CRONOS, "vvs", "VVS Finance", 0.3),
+    (ChainId.CRONOS, "mmf", "MM.Finance", 0.17),
+
+    (ChainId.MOONBEAM, "stellaswap", "StellaSwap", 0.25),
+    (ChainId.MOONBEAM, "beamswap", "BeamSwap", 0.3),
+
+    (ChainId.CELO, "ubeswap", "Ubeswap", 0.3),
+
+    (ChainId.KAVA, "equilibre", "Equilibre", 0.05),
+]
+
+
+@lru_cache(maxsize=1)
+def _build_dex_instances() -> tuple[UniswapV2DEX, ...]:
+    return tuple(
+        UniswapV2DEX(cid, name, CHAINS[cid].dex_routers[key], fee)
+        for cid, key, name, fee in _DEX_TABLE
+        if key in CHAINS[cid].dex_routers
+    )
+
+
+def create_dex_instances() -> list[UniswapV2DEX]:
+    """Create DEX instances for all supported chains (built once; each call gets a fresh list)"""
+    return list(_build_dex_instances())
@@ -2,15 +2,24 @@
 Uniswap V3 style DEX implementation
 Uses Quoter contract for price quotes
 """
+import asyncio
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional, Any
+from aiohttp import ClientResponseError
 from web3 import AsyncWeb3
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector
 
 from config.chains import ChainId, CHAINS
-from config.tokens import ALL_TOKENS
-from exchanges.dex.base_dex import BaseDEX, DEXPrice, UNISWAP_V3_QUOTER_ABI
+from config.tokens import get_token_symbol
+from exchanges.dex.base_dex import BaseDEX, DEXPrice
 from utils.rpc_manager import rpc_manager
 from utils.rate_limiter import rate_limiter
 from utils.logger import get_logger
+from utils.addresses import checksum_address
 from core.network.multicall import Call
 
 logger = get_logger(__name__)
@@ -19,6 +28,93 @@ logger = get_logger(__name__)
 # Standard fee tiers for Uniswap V3
 FEE_TIERS = [500, 3000, 10000]  # 0.05%, 0.3%, 1%
 
+# QuoterV2.quoteExactInputSingle((tokenIn, tokenOut, amountIn, fee, sqrtPriceLimitX96)), encoded without a contract object
+QUOTE_EXACT_INPUT_SINGLE_SELECTOR = function_signature_to_4byte_selector(
+    "quoteExactInputSingle((address,address,uint256,uint24,uint160))"
+)
+QUOTE_PARAMS_TYPES = ["(address,address,uint256,uint24,uint160)"]
+QUOTE_OUTPUT_TYPES = ["uint256", "uint160", "uint32", "uint256"]
+AMOUNT_WORD_OFFSET = 4 + 2 * 32  # selector + tokenIn, tokenOut words
+FEE_WORD_OFFSET = 4 + 3 * 32  # selector + tokenIn, tokenOut, amountIn words
+
+# get_price quotes only a pair's last winning tier, re-sweeping every tier this often (and whenever it fails)
+FULL_SWEEP_EVERY = 20
+# Winning tiers rarely change, so they persist across restarts
+BEST_FEE_FILE = Path("markets_cache") / "v3_best_fees.json"
+
+# "CHAIN/dex name" -> {"tokenIn-tokenOut": fee}; instances hold references into this
+_best_fee_store: Optional[dict[str, dict[str, int]]] = None
+_best_fee_dirty = False
+_best_fee_saving = False
+
+
+def _get_best_fee_store() -> dict[str, dict[str, int]]:
+    """Load the on-disk best-fee table once (empty on any problem)"""
+    global _best_fee_store
+    if _best_fee_store is None:
+        try:
+            _best_fee_store = json.loads(BEST_FEE_FILE.read_text())
+        except Exception:
+            _best_fee_store = {}
+    return _best_fee_store
+
+
+def _write_best_fee_store(text: str):
+    try:
+        BEST_FEE_FILE.parent.mkdir(exist_ok=True)
+        tmp = BEST_FEE_FILE.with_suffix(".tmp")
+        tmp.write_text(text)
+        tmp.replace(BEST_FEE_FILE)
+    except Exception as e:
+        logger.debug(f"Could not write V3 best fee cache: {e}")
+
+
+async def _flush_best_fee_store():
+    """Write the best-fee table if it changed; one writer at a time, later changes caught by its loop"""
+    global _best_fee_dirty, _best_fee_saving
+    if _best_fee_saving:
+        return
+    _best_fee_saving = True
+    try:
+        while _best_fee_dirty:
+            _best_fee_dirty = False
+            await asyncio.to_thread(_write_best_fee_store, json.dumps(_best_fee_store))
+    finally:
+        _best_fee_saving = False
+
+
+def _mark_best_fee_dirty():
+    global _best_fee_dirty
+    _best_fee_dirty = True
+
+
+@lru_cache(maxsize=1024)
+def _quote_templates(token_in: str, token_out: str) -> tuple[tuple[bytes, bytes], ...]:
+    """
+    quoteExactInputSingle calldata per fee tier, split around the amountIn word.
+    Keyed by pair only: probe amounts follow live prices and rarely repeat, so they're spliced in per call.
+    """
+    # The params tuple is static, so amountIn and fee are fixed inline words: encode once, then swap words
+    # (sqrtPriceLimitX96 = 0: no price limit)
+    call_data = QUOTE_EXACT_INPUT_SINGLE_SELECTOR + encode(QUOTE_PARAMS_TYPES, [(token_in, token_out, 0, 0, 0)])
+    head, tail = call_data[:AMOUNT_WORD_OFFSET], call_data[AMOUNT_WORD_OFFSET + 32:FEE_WORD_OFFSET]
+    fee_tail = call_data[FEE_WORD_OFFSET + 32:]
+    return tuple((head, tail + fee.to_bytes(32, "big") + fee_tail) for fee in FEE_TIERS)
+
+
+def _quote_calls(quoter: str, token_in: str, token_out: str, amount_in: int) -> tuple[Call, ...]:
+    """One quoteExactInputSingle Call per fee tier"""
+    amount_word = int(amount_in).to_bytes(32, "big")
+    return tuple(
+        Call(
+            target=quoter,
+            allow_failure=True,
+            call_data=head + amount_word + tail,
+            output_types=QUOTE_OUTPUT_TYPES
+        )
+        for head, tail in _quote_templates(token_in, token_out)
+    )
+
 
 class UniswapV3DEX(BaseDEX):
     """
@@ -33,25 +129,17 @@ class UniswapV3DEX(BaseDEX):
         quoter_address: str,
     ):
         super().__init__(chain_id, name)
-        self.quoter_address = quoter_address
-        self._web3: Optional[AsyncWeb3] = None
-        self._quoter_contract = None
+        self.quoter_address = checksum_address(quoter_address)
+        # "tokenIn-tokenOut" -> fee tier that won the last full sweep
+        self._best_fee: dict[str, int] = _get_best_fee_store().setdefault(f"{chain_id.name}/{name}", {})
+        self._quotes_since_sweep: dict[str, int] = {}
+        # (token_in, token_out) -> (amount_in, best quote or None, block, monotonic fetch time).
+        # One entry per pair: probe amounts follow live prices, so keying on them would grow without bound.
+        self._quote_cache: dict[tuple[str, str], tuple[int, Optional[DEXPrice], Optional[int], float]] = {}
     
     async def _get_web3(self) -> AsyncWeb3:
-        """Get Web3 instance"""
-        if self._web3 is None:
-            self._web3 = await rpc_manager.get_web3(self.chain_id)
-        return self._web3
-    
-    async def _get_quoter(self):
-        """Get quoter contract"""
-        if self._quoter_contract is None:
-            web3 = await self._get_web3()
-            self._quoter_contract = web3.eth.contract(
-                address=web3.to_checksum_address(self.quoter_address),
-                abi=UNISWAP_V3_QUOTER_ABI
-            )
-        return self._quoter_contract
+        """Chain-wide Web3 from rpc_manager; not pinned per instance so failover applies to every DEX"""
+        return await rpc_manager.get_web3(self.chain_id)
     
     async def get_price(
         self,
@@ -59,40 +147,46 @@ class UniswapV3DEX(BaseDEX):
         token_out: str,
         amount_in: int
     ) -> Optional[DEXPrice]:
-        """Get price for a swap using the Quoter"""
+        """Get price for a swap using the Quoter (reused within the same block)"""
         try:
-            await rate_limiter.acquire(f"chain:{self.chain_id.name}")
+            # Checksum addresses
+            token_in = checksum_address(token_in)
+            token_out = checksum_address(token_out)
             
-            web3 = await self._get_web3()
-            quoter = await self._get_quoter()
+            key = (token_in, token_out)
+            cached = self._quote_cache.get(key)
+            if cached is not None and cached[0] == amount_in and self._is_current(cached[2], cached[3]):
+                return cached[1]
             
-            # Checksum addresses
-            token_in = web3.to_checksum_address(token_in)
-            token_out = web3.to_checksum_address(token_out)
+            web3 = await self._get_web3()
+            calls = self.get_price_call_data(token_in, token_out, amount_in)
             
+            # Known winner: quote just that tier; sweep all tiers when it's due or the winner fails
+            pair_key = f"{token_in}-{token_out}"
+            best_fee = self._best_fee.get(pair_key)
             best_amount_out = 0
-            best_fee = 0
+            if best_fee in FEE_TIERS and self._quotes_since_sweep.get(pair_key, 0) < FULL_SWEEP_EVERY:
+                await rate_limiter.acquire(f"chain:{self.chain_id.name}")
+                call = calls[FEE_TIERS.index(best_fee)]
+                results = await self._quote_tiers(web3, [call])
+                if results[0]:
+                    best_amount_out = results[0]
+                    self._quotes_since_sweep[pair_key] = self._quotes_since_sweep.get(pair_key, 0) + 1
             
-            # Try each fee tier and find the best quote
-            for fee in FEE_TIERS:
-                try:
-                    # Use call to simulate the transaction
-                    result = await quoter.functions.quoteExactInputSingle(
-                        token_in,
-                        token_out,
-                        amount_in,
-                        fee
-                    ).call()
-                    
-                    amount_out = result[0]
-                    if amount_out > best_amount_out:
-                        best_amount_out = amount_out
-                        best_fee = fee
-                        
-                except Exception:
-                    continue
+            if not best_amount_out:
+                # One debit for all fee tiers, which are then quoted concurrently
+                await rate_limiter.acquire_many(f"chain:{self.chain_id.name}", len(FEE_TIERS))
+                results = await self._quote_tiers(web3, calls)
+                # Best quote across fee tiers (tiers without a pool quote 0)
+                best_amount_out, best_fee = max(zip(results, FEE_TIERS))
+                self._quotes_since_sweep[pair_key] = 0
+                if best_amount_out and self._best_fee.get(pair_key) != best_fee:
+                    self._best_fee[pair_key] = best_fee
+                    _mark_best_fee_dirty()
+                    await _flush_best_fee_store()
             
             if best_amount_out == 0:
+                self._cache_quote(key, amount_in, None)
                 return None
             
             # Calculate price
@@ -103,7 +197,7 @@ class UniswapV3DEX(BaseDEX):
             token_in_symbol = self._get_token_symbol(token_in)
             token_out_symbol = self._get_token_symbol(token_out)
             
-            return DEXPrice(
+            quote = DEXPrice(
                 dex_name=self.name,
                 chain=self.chain_id,
                 symbol=f"{token_in_symbol}/{token_out_symbol}",
@@ -112,11 +206,44 @@ class UniswapV3DEX(BaseDEX):
                 price=price,
                 fee_percent=fee_percent
             )
+            self._cache_quote(key, amount_in, quote)
+            return quote
             
         except Exception as e:
             logger.debug(f"Failed to get V3 price from {self.name}: {e}")
             return None
     
+    async def _quote_tiers(self, web3: AsyncWeb3, calls: list[Call]) -> list[int]:
+        """
+        amountOut per quoter call, 0 where it failed.
+        Raw eth_calls with pre-encoded calldata: no contract formatters, and the
+        batching provider folds concurrent calls into one JSON-RPC batch.
+        """
+        results = await asyncio.gather(
+            *(web3.eth.call({"to": call.target, "data": call.call_data}) for call in calls),
+            return_exceptions=True
+        )
+        amounts = []
+        for result in results:
+            if isinstance(result, BaseException):
+                # Reverts just mean no pool at this tier; a 429 means the budget is set too high
+                if isinstance(result, ClientResponseError) and result.status == 429:
+                    logger.warning(f"{self.name}: RPC rate limited (429); lower rpc_rps for {self.chain_id.name}")
+                amounts.append(0)
+            else:
+                amounts.append(decode(QUOTE_OUTPUT_TYPES, bytes(result))[0])
+        return amounts
+    
+    def _is_current(self, block: Optional[int], fetched_at: float) -> bool:
+        """Same block as the newHeads stream, or younger than one block time without a stream"""
+        head = rpc_manager.head_block(self.chain_id)
+        if head is not None:
+            return block == head
+        return time.monotonic() - fetched_at < CHAINS[self.chain_id].avg_block_time
+    
+    def _cache_quote(self, key: tuple[str, str], amount_in: int, quote: Optional[DEXPrice]):
+        self._quote_cache[key] = (amount_in, quote, rpc_manager.head_block(self.chain_id), time.monotonic())
+    
     async def get_reserves(
         self,
         token_a: str,
@@ -129,13 +256,8 @@ class UniswapV3DEX(BaseDEX):
         return None
     
     def _get_token_symbol(self, address: str) -> str:
-        """Get token symbol from address"""
-        address_lower = address.lower()
-        for token in ALL_TOKENS:
-            token_addr = token.get_address(self.chain_id)
-            if token_addr and token_addr.lower() == address_lower:
-                return token.symbol
-        return address[:8] + "..."
+        """Get token symbol from address (O(1) per-chain index)"""
+        return get_token_symbol(self.chain_id, address)
 
     def get_price_call_data(
         self,
@@ -144,32 +266,10 @@ class UniswapV3DEX(BaseDEX):
         amount_in: int
     ) -> list[Call]:
         """Get call data for multicall (all fee tiers)"""
-        calls = []
         try:
-            token_in_checksum = AsyncWeb3.to_checksum_address(token_in)
-            token_out_checksum = AsyncWeb3.to_checksum_address(token_out)
-            
-            if not self._quoter_contract:
-                return []
-                
-            for fee in FEE_TIERS:
-                # quoteExactInputSingle(tokenIn, tokenOut, amountIn, fee, sqrtPriceLimitX96)
-                # Note: The ABI in base_dex.py might vary. 
-                # Assuming quoteExactInputSingle(tokenIn, tokenOut, amountIn, fee, limit) or without limit
-                # The ABI in base_dex.py has 4 inputs: tokenIn, tokenOut, amountIn, fee
-                
-                call_data = self._quoter_contract.encodeABI(
-                    fn_name="quoteExactInputSingle",
-                    args=[token_in_checksum, token_out_checksum, amount_in, fee]
-                )
-                
-                calls.append(Call(
-                    target=self.quoter_address,
-                    allow_failure=True,
-                    call_data=bytes.fromhex(call_data[2:]),
-                    output_types=['uint256', 'uint160', 'uint32', 'uint256']
-                ))
-            return calls
+            return list(_quote_calls(
+                self.quoter_address, checksum_address(token_in), checksum_address(token_out), amount_in
+            ))
         except Exception as e:
             logger.error(f"Failed to encode V3 call data: {e}")
             return []
@@ -219,62 +319,26 @@ class UniswapV3DEX(BaseDEX):
             return None
 
 
+# (chain, display name, dex_routers key of the QuoterV2); rows whose quoter isn't configured are skipped
+_V3_DEPLOYMENTS: tuple[tuple[ChainId, str, str], ...] = (
+    (ChainId.ETHEREUM, "Uniswap V3", "uniswap_v3_quoter"),
+    (ChainId.BSC, "PancakeSwap V3", "pancakeswap_v3_quoter"),
+    (ChainId.POLYGON, "Uniswap V3 (Polygon)", "uniswap_v3_quoter"),
+    (ChainId.ARBITRUM, "Uniswap V3 (Arbitrum)", "uniswap_v3_quoter"),
+    (ChainId.OPTIMISM, "Uniswap V3 (Optimism)", "uniswap_v3_quoter"),
+    (ChainId.BASE, "Uniswap V3 (Base)", "uniswap_v3_quoter"),
+)
+
+
+@lru_cache(maxsize=1)
+def _build_v3_instances() -> tuple[UniswapV3DEX, ...]:
+    return tuple(
+        UniswapV3DEX(cid, name, CHAINS[cid].dex_routers[key])
+        for cid, name, key in _V3_DEPLOYMENTS
+        if key in CHAINS[cid].dex_routers
+    )
+
+
 def create_v3_instances() -> list[UniswapV3DEX]:
-    """Create V3 DEX instances for all supported chains"""
-    instances = []
-    
-    # Ethereum Uniswap V3
-    eth_config = CHAINS[ChainId.ETHEREUM]
-    if "uniswap_v3_quoter" in eth_config.dex_routers:
-        instances.append(UniswapV3DEX(
-            ChainId.ETHEREUM,
-            "Uniswap V3",
-            eth_config.dex_routers["uniswap_v3_quoter"]
-        ))
-    
-    # BSC PancakeSwap V3
-    bsc_config = CHAINS[ChainId.BSC]
-    if "pancakeswap_v3_quoter" in bsc_config.dex_routers:
-        instances.append(UniswapV3DEX(
-            ChainId.BSC,
-            "PancakeSwap V3",
-            bsc_config.dex_routers["pancakeswap_v3_quoter"]
-        ))
-    
-    # Polygon Uniswap V3
-    polygon_config = CHAINS[ChainId.POLYGON]
-    if "uniswap_v3_quoter" in polygon_config.dex_routers:
-        instances.append(UniswapV3DEX(
-            ChainId.POLYGON,
-            "Uniswap V3 (Polygon)",
-            polygon_config.dex_routers["uniswap_v3_quoter"]
-        ))
-    
-    # Arbitrum Uniswap V3
-    arb_config = CHAINS[ChainId.ARBITRUM]
-    if "uniswap_v3_quoter" in arb_config.dex_routers:
-        instances.append(UniswapV3DEX(
-            ChainId.ARBITRUM,
-            "Uniswap V3 (Arbitrum)",
-            arb_config.dex_routers["uniswap_v3_quoter"]
-        ))
-    
-    # Optimism Uniswap V3
-    op_config = CHAINS[ChainId.OPTIMISM]
-    if "uniswap_v3_quoter" in op_config.dex_routers:
-        instances.append(UniswapV3DEX(
-            ChainId.OPTIMISM,
-            "Uniswap V3 (Optimism)",
-            op_config.dex_routers["uniswap_v3_quoter"]
-        ))
-    
-    # Base Uniswap V3
-    base_config = CHAINS[ChainId.BASE]
-    if "uniswap_v3_quoter" in base_config.dex_routers:
-        instances.append(UniswapV3DEX(
-            ChainId.BASE,
-            "Uniswap V3 (Base)",
-            base_config.dex_routers["uniswap_v3_quoter"]
-        ))
-    
-    return instances
+    """Create V3 DEX instances for all supported chains (built once; each call gets a fresh list)"""
+    return list(_build_v3_instances())
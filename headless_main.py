@@ -10,28 +10,40 @@ from config.settings import DEFAULT_TRADE_SIZE_USD
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+SCAN_COUNT = 3
+SCANS_IN_FLIGHT = 2  # Overlapping scans; each still runs its CEX/DEX/gas fetches concurrently
+
 async def main():
     logger.info("Starting HEADLESS Arbitrage Scanner (Optimized)")
     
     # Init
     await arbitrage_engine.initialize()
     
-    # Run a few scans
-    for i in range(1, 4):
-        logger.info(f"--- SCAN {i} ---")
-        start = time.time()
-        opps = await arbitrage_engine.scan()
-        duration = time.time() - start
+    # Run a few scans, two in flight at a time: the next scan's RPCs overlap the previous one's decoding.
+    # scan() only touches shared engine state after its last await, so overlapping runs don't interleave.
+    from exchanges.cex.ccxt_fetcher import cex_fetcher
+    from exchanges.dex.aggregator import dex_aggregator
+    
+    pipeline = asyncio.Semaphore(SCANS_IN_FLIGHT)
+    
+    async def timed_scan(i):
+        async with pipeline:
+            logger.info(f"--- SCAN {i} ---")
+            start = time.time()
+            opps = await arbitrage_engine.scan()
+            return i, time.time() - start, opps
+    
+    wall_start = time.time()
+    for next_done in asyncio.as_completed([timed_scan(i) for i in range(1, SCAN_COUNT + 1)]):
+        i, duration, opps = await next_done
         
         logger.info(f"Scan {i} complete in {duration:.2f}s. Found {len(opps)} opportunities.")
         logger.info(f"Total pairs checked: {arbitrage_engine.total_pairs_checked}")
         
         # Check internal CEX fetcher state
-        from exchanges.cex.ccxt_fetcher import cex_fetcher
         logger.info(f"CEX initialized exchanges: {len(cex_fetcher._exchanges)}")
         
         # Check DEX internal state (if possible)
-        from exchanges.dex.aggregator import dex_aggregator
         # Peek at one V2 DEX cache if possible
         if dex_aggregator._v2_dexs:
             sample_dex = dex_aggregator._v2_dexs[0]
@@ -41,8 +53,13 @@ async def main():
         if len(opps) > 0:
             for j, opp in enumerate(opps[:5]):
                 logger.info(f"OPP #{j+1}: {opp.symbol} | Spread: {opp.spread_pct:.2f}% | Profit: ${opp.net_profit_usd:.2f} | {opp.buy_source.source_id} -> {opp.sell_source.source_id}")
-        
-        await asyncio.sleep(2)
+    
+    logger.info(f"{SCAN_COUNT} scans finished in {time.time() - wall_start:.2f}s wall-clock")
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
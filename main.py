@@ -56,6 +56,13 @@ async def main():
 
 
 if __name__ == "__main__":
+    # Optional libuv-backed event loop (faster socket dispatch for the WS streams)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -30,6 +30,9 @@ class TerminalDashboard:
         self._pairs_checked = 0
         self._scan_count = 0
         self._running = False
+        # Display tree is rebuilt only after something it shows has changed
+        self._display: Optional[Table] = None
+        self._dirty = True
     
     def _create_header(self) -> Panel:
         """Create header panel"""
@@ -163,7 +166,10 @@ class TerminalDashboard:
         return Panel(Align.center(text), border_style="green", padding=(0, 2))
     
     def _generate_display(self) -> Table:
-        """Generate the full display"""
+        """Generate the full display (cached until update()/scan start marks it dirty)"""
+        if self._display is not None and not self._dirty:
+            return self._display
+        
         layout = Table.grid(expand=True)
         layout.add_column(ratio=1)
         
@@ -174,6 +180,8 @@ class TerminalDashboard:
         layout.add_row(self._create_summary_panel())
         layout.add_row(self._create_info_panel())
         
+        self._display = layout
+        self._dirty = False
         return layout
     
     def update(self, opportunities: list[ArbitrageOpportunity]):
@@ -182,6 +190,7 @@ class TerminalDashboard:
         self._last_update = datetime.now()
         self._pairs_checked = arbitrage_engine.total_pairs_checked
         self._scan_count += 1
+        self._dirty = True
     
     async def run(self):
         """Run the dashboard with live updates"""
@@ -204,6 +213,7 @@ class TerminalDashboard:
         async def on_scan_start():
             # Update the time so the user knows a new scan has begun
             self._last_update = datetime.now()
+            self._dirty = True
 
         # Start scanning in background
         scan_task = asyncio.create_task(
@@ -213,7 +223,8 @@ class TerminalDashboard:
         try:
             with Live(self._generate_display(), refresh_per_second=2, console=console) as live:
                 while True:
-                    live.update(self._generate_display())
+                    if self._dirty:
+                        live.update(self._generate_display())
                     await asyncio.sleep(0.5)
                     
         except asyncio.CancelledError:
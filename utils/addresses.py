@@ -0,0 +1,20 @@
+"""
+Address helpers
+"""
+import re
+import sys
+from functools import lru_cache
+from eth_utils import to_checksum_address
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+# 0x + 40 hex digits, any case
+ADDRESS_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+
+
+@lru_cache(maxsize=4096)
+def checksum_address(address: str) -> str:
+    """
+    EIP-55 checksum an address, memoized (the same few hundred addresses recur every scan).
+    Results are interned, so lookups keyed by checksummed addresses match on identity.
+    """
+    return sys.intern(to_checksum_address(address))
@@ -1,9 +1,19 @@
-import csv
+import asyncio
+import atexit
 import os
 from datetime import datetime
-from typing import Any
+from typing import Any, Optional
 from pathlib import Path
 
+# Rows are buffered and written in batches: at most this many rows or this long after the first
+FLUSH_BATCH_SIZE = 200
+FLUSH_INTERVAL = 0.05  # seconds
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Every column is a number or an identifier, so rows are formatted directly instead of through csv.writer.
+# \r\n matches the line ending csv.writer used for earlier rows in existing files.
+ROW_FORMAT = "{},{},{},{},{:.6f},{},{:.6f},{:.2f}%,${:.2f},${:.2f},${:.2f},${:.2f}\r\n"
+
 class OpportunityLogger:
     """Logs arbitrage opportunities to a CSV file"""
     
@@ -23,53 +33,88 @@ class OpportunityLogger:
             "Fees",
             "Net Profit"
         ]
+        self._buf: list[str] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._file = None
+        # Last formatted timestamp second: opportunities mostly arrive within the same second
+        self._ts_second: Optional[datetime] = None
+        self._ts_text = ""
         self._ensure_file()
+        atexit.register(self._flush_sync)
         
     def _ensure_file(self):
-        """Create file with headers if it doesn't exist"""
+        """Create file with headers if it doesn't exist, and keep it open for appending"""
         file_path = Path(self.filename)
-        if not file_path.exists():
-            with open(self.filename, mode='w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(self.headers)
+        is_new = not file_path.exists()
+        # Binary with a large buffer: rows are encoded once per batch and skip the text layer
+        self._file = open(self.filename, mode='ab', buffering=WRITE_BUFFER_SIZE)
+        if is_new:
+            self._file.write((",".join(self.headers) + "\r\n").encode('utf-8'))
+            self._file.flush()
+    
+    def _flush_sync(self):
+        """Write all buffered rows in one go"""
+        rows, self._buf = self._buf, []
+        if rows and self._file is not None:
+            self._file.write("".join(rows).encode('utf-8'))
+            self._file.flush()
+    
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            self._flush_sync()
+        finally:
+            self._flush_task = None
     
     def log(self, opportunities: list[Any]):
-        """Log a list of opportunities"""
+        """Queue a list of opportunities for the next batched write"""
         if not opportunities:
             return
+        
+        for opp in opportunities:
+            # Format timestamp (once per second)
+            second = opp.timestamp.replace(microsecond=0)
+            if second != self._ts_second:
+                self._ts_second = second
+                self._ts_text = second.strftime("%Y-%m-%d %H:%M:%S")
+            ts = self._ts_text
             
-        with open(self.filename, mode='a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            for opp in opportunities:
-                # Format timestamp
-                ts = opp.timestamp.strftime("%Y-%m-%d %H:%M:%S")
-                
-                # Format level
-                level = opp.profit_level.name if opp.profit_level else "LOW"
-                
-                # Format sources
-                buy_src = f"{opp.buy_source.source_name}"
-                if opp.buy_source.chain:
-                    buy_src += f" ({opp.buy_source.chain.name})"
-                    
-                sell_src = f"{opp.sell_source.source_name}"
-                if opp.sell_source.chain:
-                    sell_src += f" ({opp.sell_source.chain.name})"
-                
-                writer.writerow([
-                    ts,
-                    level,
-                    opp.symbol,
-                    buy_src,
-                    f"{opp.buy_price:.6f}",
-                    sell_src,
-                    f"{opp.sell_price:.6f}",
-                    f"{opp.spread_pct:.2f}%",
-                    f"${opp.gross_profit_usd:.2f}",
-                    f"${opp.gas_cost_usd:.2f}",
-                    f"${opp.withdrawal_fee_usd:.2f}",
-                    f"${opp.net_profit_usd:.2f}"
-                ])
+            # Format level
+            level = opp.profit_level.name if opp.profit_level else "LOW"
+            
+            # Format sources
+            buy_src = f"{opp.buy_source.source_name}"
+            if opp.buy_source.chain:
+                buy_src += f" ({opp.buy_source.chain.name})"
                 
+            sell_src = f"{opp.sell_source.source_name}"
+            if opp.sell_source.chain:
+                sell_src += f" ({opp.sell_source.chain.name})"
+            
+            self._buf.append(ROW_FORMAT.format(
+                ts,
+                level,
+                opp.symbol.replace(",", ""),
+                buy_src.replace(",", ""),
+                opp.buy_price,
+                sell_src.replace(",", ""),
+                opp.sell_price,
+                opp.spread_pct,
+                opp.gross_profit_usd,
+                opp.gas_cost_usd,
+                opp.withdrawal_fee_usd,
+                opp.net_profit_usd
+            ))
+        
+        if len(self._buf) >= FLUSH_BATCH_SIZE:
+            self._flush_sync()
+        elif self._flush_task is None:
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+            except RuntimeError:
+                # No event loop (sync caller): write straight away
+                self._flush_sync()
+
+
 # Global instance
 csv_logger = OpportunityLogger()
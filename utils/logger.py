@@ -1,8 +1,11 @@
 """
 Logging utilities
 """
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from rich.logging import RichHandler
 from rich.console import Console
 
@@ -11,22 +14,53 @@ from config.settings import LOG_LEVEL
 # Global console for rich output
 console = Console()
 
+# Formats and writes records off the event loop thread; started by setup_logging()
+_listener: QueueListener | None = None
+
+
+class _LocalQueueHandler(QueueHandler):
+    """
+    Enqueue records for the listener thread. Same process, so exc_info is kept
+    (rich tracebacks still work); only the message is rendered up front.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
 
 def setup_logging():
-    """Configure logging with rich handler"""
+    """Configure logging: log calls enqueue, a background thread renders with rich"""
+    global _listener
+    if _listener is not None:
+        return
+    
+    rich_handler = RichHandler(
+        console=console,
+        rich_tracebacks=True,
+        show_path=False,
+        markup=True
+    )
+    rich_handler.setFormatter(logging.Formatter("%(message)s", datefmt="[%X]"))
+    handlers: list[logging.Handler] = [rich_handler]
+    if LOG_LEVEL == "DEBUG":
+        # Debug traffic is high-volume: plain stream output, no markup parsing or rich rendering
+        rich_handler.addFilter(lambda record: record.levelno >= logging.INFO)
+        debug_handler = logging.StreamHandler(sys.stderr)
+        debug_handler.setFormatter(logging.Formatter("[%(asctime)s] DEBUG %(message)s", datefmt="%X"))
+        debug_handler.addFilter(lambda record: record.levelno < logging.INFO)
+        handlers.append(debug_handler)
+    
+    log_queue = queue.SimpleQueue()
     logging.basicConfig(
         level=getattr(logging, LOG_LEVEL),
-        format="%(message)s",
-        datefmt="[%X]",
-        handlers=[
-            RichHandler(
-                console=console,
-                rich_tracebacks=True,
-                show_path=False,
-                markup=True
-            )
-        ]
+        handlers=[_LocalQueueHandler(log_queue)]
     )
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Drain whatever is still queued on exit
+    atexit.register(_listener.stop)
     
     # Reduce noise from external libraries
     logging.getLogger("web3").setLevel(logging.WARNING)
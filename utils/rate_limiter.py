@@ -3,11 +3,11 @@ Rate limiter for API calls
 """
 import asyncio
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class RateLimitConfig:
     """Rate limit configuration"""
     requests_per_second: float
@@ -19,6 +19,8 @@ class TokenBucketRateLimiter:
     Token bucket rate limiter for controlling API request rates
     """
     
+    __slots__ = ("rate", "burst", "tokens", "last_update", "_lock", "_waiters")
+    
     def __init__(self, rate: float, burst: int = 1):
         """
         Args:
@@ -30,27 +32,79 @@ class TokenBucketRateLimiter:
         self.tokens = float(burst)
         self.last_update = time.monotonic()
         self._lock = asyncio.Lock()
+        self._waiters = 0  # Callers in the slow path; while any wait, newcomers don't jump ahead
+    
+    def _refill(self):
+        """Add the tokens earned since the last update, capped at the burst size"""
+        now = time.monotonic()
+        elapsed = now - self.last_update
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.last_update = now
+    
+    async def acquire(self, cost: int = 1):
+        """Wait until `cost` tokens are available, then take them"""
+        # Costs above the burst size go through once the bucket is full (leaving a debt)
+        cost_fit = min(cost, self.burst)
+        # Fast path without the lock: nothing else runs on the loop between here and the return.
+        # Only taken when nobody is waiting, so a stream of cheap acquires can't starve a costly one.
+        if not self._waiters:
+            self._refill()
+            if self.tokens >= cost_fit:
+                self.tokens -= cost
+                return
+        self._waiters += 1
+        try:
+            # The lock is held while sleeping so waiters are served in FIFO order;
+            # each one only sleeps for its own shortfall once it reaches the front
+            async with self._lock:
+                while True:
+                    self._refill()
+                    if self.tokens >= cost_fit:
+                        self.tokens -= cost
+                        return
+                    await asyncio.sleep((cost_fit - self.tokens) / self.rate)
+        finally:
+            self._waiters -= 1
+
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window rate limiter: at most `max_requests` units of cost in any `window_seconds`.
+    Unlike a token bucket it never bursts above the budget and then stalls, so throughput
+    stays flat near the provider's actual limit.
+    """
     
-    async def acquire(self):
-        """Wait until a token is available"""
-        wait_time = 0
+    __slots__ = ("window", "max_requests", "_events", "_used", "_lock")
+    
+    def __init__(self, window_seconds: float, max_requests: int):
+        self.window = window_seconds
+        self.max_requests = max_requests
+        self._events: deque[tuple[float, int]] = deque()  # (monotonic time, cost), oldest first
+        self._used = 0  # Sum of cost currently in the window
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, cost: int = 1):
+        """Wait until `cost` fits in the window, then record it in one step"""
+        # Oversized requests are admitted once the window is empty rather than never
+        cost_fit = min(cost, self.max_requests)
+        # The lock is held while waiting so callers are admitted in FIFO order
         async with self._lock:
-            now = time.monotonic()
-            elapsed = now - self.last_update
-            # Add tokens based on elapsed time, but only if some time passed
-            if elapsed > 0:
-                self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
-                self.last_update = now
-            
-            if self.tokens < 1:
-                # Need to wait
-                wait_time = (1 - self.tokens) / self.rate
-                self.tokens = 0 # Reserve the token we're waiting for
-            else:
-                self.tokens -= 1
-        
-        if wait_time > 0:
-            await asyncio.sleep(wait_time)
+            while True:
+                now = time.monotonic()
+                while self._events and now - self._events[0][0] >= self.window:
+                    self._used -= self._events.popleft()[1]
+                if self._used + cost_fit <= self.max_requests:
+                    self._events.append((now, cost))
+                    self._used += cost
+                    return
+                # Sleep until enough of the oldest entries leave the window
+                freed = 0
+                for stamp, event_cost in self._events:
+                    freed += event_cost
+                    if self._used - freed + cost_fit <= self.max_requests:
+                        break
+                await asyncio.sleep(max(stamp + self.window - now, 0.001))
 
 
 class MultiRateLimiter:
@@ -59,22 +113,36 @@ class MultiRateLimiter:
     """
     
     def __init__(self):
-        self._limiters: dict[str, TokenBucketRateLimiter] = {}
+        self._limiters: dict[str, TokenBucketRateLimiter | SlidingWindowLimiter] = {}
         self._lock = asyncio.Lock()
     
     def register(self, key: str, rate: float, burst: int = 1):
         """Register a rate limiter for a key"""
         self._limiters[key] = TokenBucketRateLimiter(rate, burst)
     
+    def register_window(self, key: str, window_seconds: float, max_requests: int):
+        """Register a sliding-window limiter for a key"""
+        self._limiters[key] = SlidingWindowLimiter(window_seconds, max_requests)
+    
     async def acquire(self, key: str):
         """Acquire a token for the given key"""
-        if key not in self._limiters:
+        await self.acquire_many(key, 1)
+    
+    async def acquire_many(self, key: str, cost: int = 1):
+        """Debit `cost` tokens for the given key under one lock acquisition and a single wait"""
+        limiter = self._limiters.get(key)
+        if limiter is None:
             # Default rate limit if not registered
             async with self._lock:
-                if key not in self._limiters:
-                    self._limiters[key] = TokenBucketRateLimiter(10.0, 5)
+                limiter = self._limiters.get(key)
+                if limiter is None:
+                    if key.startswith("chain:"):
+                        limiter = SlidingWindowLimiter(1.0, 25)
+                    else:
+                        limiter = TokenBucketRateLimiter(10.0, 5)
+                    self._limiters[key] = limiter
         
-        await self._limiters[key].acquire()
+        await limiter.acquire(cost)
 
 
 # Global rate limiter instance
@@ -95,10 +163,10 @@ def setup_rate_limiters():
         )
     
     # Chain rate limiters (for RPC calls)
-    for chain_id in CHAINS:
-        # Conservative rate limit for free RPCs
-        rate_limiter.register(
+    for chain_id, config in CHAINS.items():
+        # Per-chain RPC budget (conservative default for free RPCs), spread evenly over a sliding window
+        rate_limiter.register_window(
             f"chain:{chain_id.name}",
-            25.0,  # 25 req/sec
-            burst=5
+            1.0,
+            config.rpc_rps
         )
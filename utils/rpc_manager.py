@@ -2,14 +2,61 @@
 RPC Endpoint Manager with automatic failover and rotation
 """
 import asyncio
+import math
 import time
 import inspect
 from dataclasses import dataclass, field
 from typing import Any, Callable
-from web3 import AsyncWeb3, AsyncHTTPProvider
+from web3 import AsyncWeb3
 from web3.exceptions import Web3RPCError
 import aiohttp
 from config.chains import ChainId, ChainConfig, CHAINS
+from core.network.batch_provider import AsyncBatchingHTTPProvider
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Reconnect backoff for newHeads WebSockets (seconds)
+WS_RECONNECT_MIN = 1.0
+WS_RECONNECT_MAX = 60.0
+
+# How long gas price / block number answers are shared between callers (seconds)
+GAS_PRICE_TTL = 3.0
+BLOCK_NUMBER_TTL = 1.0
+# When every endpoint fails, a value up to this old is returned instead of the error
+STALE_MAX_AGE = 60.0
+# call(): start the next endpoint if the current ones haven't answered within HEDGE_DELAY; give up after CALL_TIMEOUT
+HEDGE_DELAY = 0.2
+CALL_TIMEOUT = 20.0
+# An endpoint with 3+ failures is skipped until this long after its last one
+UNHEALTHY_WINDOW_NS = 60_000_000_000
+# prewarm() stops waiting after this long (seconds); the rest complete in the background
+PREWARM_TIMEOUT = 3.0
+
+# How call() invokes each web3.eth attribute: awaitable properties vs coroutine methods.
+# Methods not listed fall back to inspecting the attribute.
+PROPERTY = "prop"
+COROUTINE = "coro"
+_METHOD_KIND: dict[str, str] = {
+    "gas_price": PROPERTY,
+    "block_number": PROPERTY,
+    "chain_id": PROPERTY,
+    "max_priority_fee": PROPERTY,
+    "call": COROUTINE,
+    "get_block": COROUTINE,
+    "get_balance": COROUTINE,
+    "get_transaction_count": COROUTINE,
+    "get_transaction_receipt": COROUTINE,
+    "estimate_gas": COROUTINE,
+    "fee_history": COROUTINE,
+    "send_raw_transaction": COROUTINE,
+}
+# Reads whose identical concurrent calls share one request (never writes like send_raw_transaction)
+COLLAPSIBLE_METHODS = frozenset({
+    "gas_price", "block_number", "chain_id", "max_priority_fee",
+    "call", "get_block", "get_balance", "get_transaction_count",
+    "get_transaction_receipt", "estimate_gas", "fee_history",
+})
 
 # Global optimized session for all network requests
 _GLOBAL_SESSION: aiohttp.ClientSession | None = None
@@ -27,7 +74,8 @@ async def get_global_session() -> aiohttp.ClientSession:
             use_dns_cache=True,
             ttl_dns_cache=600,     # Cache for 10 minutes
             limit=500,             # Increased connection limit for parallel scans
-            limit_per_host=50,     # Higher limit per node
+            limit_per_host=100,    # Matches the DEX aggregator's in-flight quote cap
+            keepalive_timeout=60,  # Keep idle sockets warm between scan cycles
             enable_cleanup_closed=True,
             resolver=resolver      # Use custom async resolver
         )
@@ -39,33 +87,47 @@ async def get_global_session() -> aiohttp.ClientSession:
     return _GLOBAL_SESSION
 
 
-@dataclass
+def _freeze(value: Any) -> Any:
+    """Hashable stand-in for call arguments (dicts and lists, e.g. eth_call params)"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@dataclass(slots=True)
 class RPCEndpointHealth:
     """Track health of an RPC endpoint"""
     url: str
     failures: int = 0
-    last_failure: float = 0
-    last_success: float = 0
-    avg_latency_ms: float = 0
+    # time.monotonic_ns() stamps: cheaper than time.time() and immune to clock jumps
+    last_failure_ns: int = 0
+    last_success_ns: int = 0
+    avg_latency_ms: float = math.nan  # NaN until the first success (0 ms is a real measurement)
+    
+    @property
+    def latency_rank(self) -> float:
+        """Latency for ranking; endpoints without a measurement sort last"""
+        return math.inf if math.isnan(self.avg_latency_ms) else self.avg_latency_ms
     
-    def record_success(self, latency_ms: float):
-        self.last_success = time.time()
+    def record_success(self, latency_ns: int):
+        self.last_success_ns = time.monotonic_ns()
         self.failures = 0
+        latency_ms = latency_ns / 1_000_000
         # Exponential moving average
-        if self.avg_latency_ms == 0:
+        if math.isnan(self.avg_latency_ms):
             self.avg_latency_ms = latency_ms
         else:
             self.avg_latency_ms = 0.8 * self.avg_latency_ms + 0.2 * latency_ms
     
     def record_failure(self):
         self.failures += 1
-        self.last_failure = time.time()
+        self.last_failure_ns = time.monotonic_ns()
     
     def is_healthy(self) -> bool:
         # Consider unhealthy if 3+ failures in last 60 seconds
-        if self.failures >= 3 and time.time() - self.last_failure < 60:
-            return False
-        return True
+        return self.failures < 3 or time.monotonic_ns() - self.last_failure_ns >= UNHEALTHY_WINDOW_NS
 
 
 class RPCManager:
@@ -78,6 +140,20 @@ class RPCManager:
         self._endpoint_health: dict[ChainId, dict[str, RPCEndpointHealth]] = {}
         self._current_index: dict[ChainId, int] = {}
         self._locks: dict[ChainId, asyncio.Lock] = {}
+        # chain -> (block_number, monotonic time it was read)
+        self._block_numbers: dict[ChainId, tuple[int, float]] = {}
+        # Chains whose newHeads WebSocket is currently delivering; their block number is pushed, not polled
+        self._heads_live: set[ChainId] = set()
+        self._head_tasks: dict[ChainId, asyncio.Task] = {}
+        # chain -> (healthy endpoints fastest first, monotonic_ns until which health can't change on its own)
+        self._ranked: dict[ChainId, tuple[list[str], float]] = {}
+        # (chain, method) -> (monotonic time, value) and the single in-flight fetch for each key
+        self._cache: dict[tuple[ChainId, str], tuple[float, Any]] = {}
+        self._inflight: dict[tuple[ChainId, str], asyncio.Future] = {}
+        # (chain, method, frozen args, frozen kwargs) -> in-flight call() shared by identical reads
+        self._calls_inflight: dict[tuple, asyncio.Future] = {}
+        # prewarm() requests still running after PREWARM_TIMEOUT
+        self._warmup_tasks: set[asyncio.Task] = set()
         
         # Initialize for all chains
         for chain_id, config in CHAINS.items():
@@ -87,41 +163,92 @@ class RPCManager:
             self._locks[chain_id] = asyncio.Lock()
             
             for url in config.rpc_endpoints:
-                self._endpoint_health[chain_id][url] = RPCEndpointHealth(url=url)
+                if url is not None:
+                    self._endpoint_health[chain_id][url] = RPCEndpointHealth(url=url)
     
     async def _get_web3(self, chain_id: ChainId, url: str) -> AsyncWeb3:
         """Get or create a Web3 instance for a specific endpoint"""
-        if url not in self._web3_instances[chain_id]:
-            session = await get_global_session()
-            provider = AsyncHTTPProvider(
-                url,
-                request_kwargs={"timeout": 15},
-                # Note: Newer web3.py versions allow passing the session or use a global one
-            )
-            # Inject our shared session into the provider
-            provider._request_session = session 
-            self._web3_instances[chain_id][url] = AsyncWeb3(provider)
+        web3 = self._web3_instances[chain_id].get(url)
+        if web3 is not None:
+            return web3
+        # Creation awaits (session caching), so concurrent first callers are serialised per chain
+        async with self._locks[chain_id]:
+            if url not in self._web3_instances[chain_id]:
+                session = await get_global_session()
+                # eth_calls that miss Multicall3 get coalesced into JSON-RPC batches
+                provider = AsyncBatchingHTTPProvider(url, session, timeout=15)
+                # Inject our shared session into the provider so every RPC shares one pool
+                if hasattr(provider, "cache_async_session"):
+                    await provider.cache_async_session(session)
+                else:
+                    provider._request_session = session
+                self._web3_instances[chain_id][url] = AsyncWeb3(provider)
         return self._web3_instances[chain_id][url]
     
     def _get_best_endpoint(self, chain_id: ChainId) -> str:
-        """Get the best available endpoint for a chain"""
+        """Get the best available endpoint for a chain (ranking is cached until health changes)"""
+        return self._current_ranking(chain_id)[0]
+    
+    def _current_ranking(self, chain_id: ChainId) -> list[str]:
+        ranked = self._ranked.get(chain_id)
+        if ranked is None or time.monotonic_ns() >= ranked[1]:
+            ranked = self._rank_endpoints(chain_id)
+        return ranked[0]
+    
+    def _endpoint_order(self, chain_id: ChainId) -> list[str]:
+        """Healthy endpoints fastest first, then the unhealthy ones as a last resort"""
+        ranked = self._current_ranking(chain_id)
+        return ranked + [url for url in CHAINS[chain_id].rpc_endpoints if url and url not in ranked]
+    
+    def _rank_endpoints(self, chain_id: ChainId) -> tuple[list[str], float]:
+        """Filter and sort the chain's endpoints once; cached until a recorded call or a failure expiring"""
         config = CHAINS[chain_id]
         healthy_endpoints = []
+        valid_until = float('inf')
         
         for url in config.rpc_endpoints:
+            if url is None:  # Keyed endpoint without a key configured
+                continue
             health = self._endpoint_health[chain_id][url]
             if health.is_healthy():
-                healthy_endpoints.append((url, health.avg_latency_ms or float('inf')))
+                healthy_endpoints.append((url, health.latency_rank))
+            else:
+                # Becomes healthy again UNHEALTHY_WINDOW_NS after its last failure
+                valid_until = min(valid_until, health.last_failure_ns + UNHEALTHY_WINDOW_NS)
         
         if not healthy_endpoints:
             # All unhealthy, reset and use first
-            for url in config.rpc_endpoints:
-                self._endpoint_health[chain_id][url].failures = 0
-            return config.rpc_endpoints[0]
+            for health in self._endpoint_health[chain_id].values():
+                health.failures = 0
+            ranked = ([config.get_rpc(0)], 0.0)
+            self._ranked.pop(chain_id, None)
+            return ranked
         
-        # Sort by latency, return fastest
+        # Sort by latency, fastest first
         healthy_endpoints.sort(key=lambda x: x[1])
-        return healthy_endpoints[0][0]
+        ranked = ([url for url, _ in healthy_endpoints], valid_until)
+        self._ranked[chain_id] = ranked
+        return ranked
+    
+    def _record_result(self, chain_id: ChainId, url: str, latency_ns: int | None):
+        """Update endpoint health (None = failure) and drop the cached ranking if it may have changed"""
+        health = self._endpoint_health[chain_id][url]
+        if latency_ns is None:
+            health.record_failure()
+            self._ranked.pop(chain_id, None)
+            return
+        health.record_success(latency_ns)
+        ranked = self._ranked.get(chain_id)
+        if ranked is None:
+            return
+        urls = ranked[0]
+        if url != urls[0]:
+            # A non-leader got faster (or came back): re-rank
+            self._ranked.pop(chain_id, None)
+        elif len(urls) > 1:
+            runner_up = self._endpoint_health[chain_id][urls[1]].latency_rank
+            if health.latency_rank > runner_up:
+                self._ranked.pop(chain_id, None)
     
     async def call(
         self,
@@ -131,59 +258,266 @@ class RPCManager:
         **kwargs
     ) -> Any:
         """
-        Execute an RPC call with automatic failover
+        Execute an RPC call with hedged failover. Identical concurrent reads share one request.
+        """
+        if method in COLLAPSIBLE_METHODS:
+            try:
+                key = (chain_id, method, _freeze(args), _freeze(kwargs))
+                hash(key)
+            except TypeError:
+                key = None
+            if key is not None:
+                inflight = self._calls_inflight.get(key)
+                if inflight is None:
+                    inflight = asyncio.ensure_future(self._call_hedged(chain_id, method, args, kwargs))
+                    self._calls_inflight[key] = inflight
+                    inflight.add_done_callback(lambda future: self._drop_inflight_call(key, future))
+                # Shielded so one cancelled caller doesn't cancel the request for the others
+                return await asyncio.shield(inflight)
+        return await self._call_hedged(chain_id, method, args, kwargs)
+    
+    def _drop_inflight_call(self, key: tuple, future: asyncio.Future):
+        if self._calls_inflight.get(key) is future:
+            del self._calls_inflight[key]
+    
+    async def _call_hedged(self, chain_id: ChainId, method: str, args: tuple, kwargs: dict) -> Any:
+        """
+        Endpoints are tried fastest first, the next one is started when the current ones
+        fail or haven't answered within HEDGE_DELAY, and the first success wins
         """
         config = CHAINS[chain_id]
+        endpoints = self._endpoint_order(chain_id)
         last_error = None
+        pending: dict[asyncio.Task, str] = {}
+        next_index = 0
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CALL_TIMEOUT
         
-        for attempt in range(len(config.rpc_endpoints)):
-            url = self._get_best_endpoint(chain_id)
-            web3 = await self._get_web3(chain_id, url)
-            
-            start_time = time.time()
-            try:
-                async def execute_call():
-                    # Get the attribute from web3.eth
-                    attr = getattr(web3.eth, method)
-                    
-                    # In Web3.py v6+, some are awaitable properties (gas_price, block_number)
-                    if inspect.isawaitable(attr):
-                        return await attr
-                    elif callable(attr):
-                        return await attr(*args, **kwargs)
-                    else:
-                        return attr
-
-                result = await asyncio.wait_for(execute_call(), timeout=20.0)
-                
-                # Record success
-                latency_ms = (time.time() - start_time) * 1000
-                self._endpoint_health[chain_id][url].record_success(latency_ms)
-                
-                return result
+        try:
+            while True:
+                if next_index < len(endpoints) and (not pending or loop.time() >= hedge_at):
+                    url = endpoints[next_index]
+                    next_index += 1
+                    task = asyncio.create_task(self._call_endpoint(chain_id, url, method, args, kwargs))
+                    pending[task] = url
+                    hedge_at = loop.time() + HEDGE_DELAY
+                if not pending:
+                    break
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    # Endpoints still running at the deadline count as failed, like a timeout did
+                    for url in pending.values():
+                        self._record_result(chain_id, url, None)
+                    last_error = asyncio.TimeoutError(f"no response within {CALL_TIMEOUT:g}s")
+                    break
                 
-            except Exception as e:
-                self._endpoint_health[chain_id][url].record_failure()
-                last_error = e
-                continue
+                # Wake on the first result or when it's time to hedge to the next endpoint
+                timeout = remaining
+                if next_index < len(endpoints):
+                    timeout = min(max(hedge_at - loop.time(), 0), remaining)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    del pending[task]
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+        finally:
+            # Losers are cancelled, not recorded as failures
+            for task in pending:
+                task.cancel()
         
         raise Exception(f"All RPC endpoints failed for {config.name}: {last_error}")
     
+    async def _call_endpoint(self, chain_id: ChainId, url: str, method: str, args: tuple, kwargs: dict) -> Any:
+        """One attempt against one endpoint, recorded in its health"""
+        web3 = await self._get_web3(chain_id, url)
+        start_ns = time.monotonic_ns()
+        try:
+            # In Web3.py v6+, some are awaitable properties (gas_price, block_number)
+            kind = _METHOD_KIND.get(method)
+            if kind is PROPERTY:
+                result = await getattr(web3.eth, method)
+            elif kind is COROUTINE:
+                result = await getattr(web3.eth, method)(*args, **kwargs)
+            else:
+                attr = getattr(web3.eth, method)
+                if inspect.isawaitable(attr):
+                    result = await attr
+                elif callable(attr):
+                    result = await attr(*args, **kwargs)
+                else:
+                    result = attr
+        except Exception:
+            self._record_result(chain_id, url, None)
+            raise
+        
+        # Record success
+        self._record_result(chain_id, url, time.monotonic_ns() - start_ns)
+        return result
+    
     async def get_web3(self, chain_id: ChainId) -> AsyncWeb3:
         """Get a Web3 instance for the best available endpoint"""
         url = self._get_best_endpoint(chain_id)
         return await self._get_web3(chain_id, url)
     
+    async def _cached(self, chain_id: ChainId, method: str, ttl: float) -> Any:
+        """
+        self.call(chain_id, method) shared for `ttl` seconds; concurrent callers
+        on a miss wait on one upstream request. If that fails, the last good value
+        is served for up to STALE_MAX_AGE.
+        """
+        key = (chain_id, method)
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self.call(chain_id, method))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda future: self._finish_fetch(key, future))
+        try:
+            # Shielded so one cancelled caller doesn't cancel the fetch for the others
+            return await asyncio.shield(inflight)
+        except Exception as e:
+            # Expired entries stay in _cache as the last good value
+            if cached is not None and time.monotonic() - cached[0] < STALE_MAX_AGE:
+                logger.warning(
+                    f"{method} failed for {chain_id.name} ({e}); "
+                    f"using value from {time.monotonic() - cached[0]:.0f}s ago"
+                )
+                return cached[1]
+            raise
+    
+    def _finish_fetch(self, key: tuple[ChainId, str], future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled() and future.exception() is None:
+            self._cache[key] = (time.monotonic(), future.result())
+    
     async def get_gas_price(self, chain_id: ChainId) -> int:
-        """Get current gas price for a chain"""
-        return await self.call(chain_id, "gas_price")
+        """Get current gas price for a chain (shared for GAS_PRICE_TTL)"""
+        return await self._cached(chain_id, "gas_price", GAS_PRICE_TTL)
     
     async def get_block_number(self, chain_id: ChainId) -> int:
-        """Get current block number for a chain"""
-        return await self.call(chain_id, "block_number")
+        """Get current block number for a chain (shared for BLOCK_NUMBER_TTL)"""
+        return await self._cached(chain_id, "block_number", BLOCK_NUMBER_TTL)
+
+    async def get_gas_and_block(self, chain_id: ChainId) -> tuple[int, int]:
+        """Gas price and block number together; issued concurrently so the provider sends them as one batch"""
+        gas_price, block = await asyncio.gather(
+            self.get_gas_price(chain_id),
+            self.get_block_number(chain_id)
+        )
+        return gas_price, block
 
+    async def get_latest_block(self, chain_id: ChainId) -> int:
+        """
+        Block number polled at most once per average block time.
+        Cheap enough to key per-block caches on.
+        """
+        cached = self._block_numbers.get(chain_id)
+        now = time.monotonic()
+        if cached is not None and (
+            chain_id in self._heads_live or now - cached[1] < CHAINS[chain_id].avg_block_time
+        ):
+            return cached[0]
+        
+        block = await self.get_block_number(chain_id)
+        # A newHeads push that landed while we awaited is at least as fresh; keep it
+        if chain_id not in self._heads_live:
+            # Stamp with when the value was actually fetched: it may be a shared or last-good (stale) answer
+            entry = self._cache.get((chain_id, "block_number"))
+            fetched_at = entry[0] if entry is not None and entry[1] == block else now
+            self._block_numbers[chain_id] = (block, fetched_at)
+        return block
+
+    def head_block(self, chain_id: ChainId) -> int | None:
+        """Block number pushed by the chain's newHeads stream, None while it isn't delivering (never polls)"""
+        if chain_id in self._heads_live:
+            return self._block_numbers[chain_id][0]
+        return None
+
+    def subscribe_new_heads(self, chain_id: ChainId, on_block: Callable[[int], None]) -> bool:
+        """
+        Push block numbers from an eth_subscribe("newHeads") WebSocket into get_latest_block()
+        and call on_block(number) for each new head. Reconnects in the background until close().
+        Returns False if the chain has no WebSocket endpoint.
+        """
+        if chain_id in self._head_tasks:
+            return True
+        if not any(CHAINS[chain_id].ws_endpoints):
+            return False
+        self._head_tasks[chain_id] = asyncio.create_task(self._watch_new_heads(chain_id, on_block))
+        return True
+    
+    async def _watch_new_heads(self, chain_id: ChainId, on_block: Callable[[int], None]):
+        """Subscription loop: rotate through ws endpoints with exponential backoff"""
+        config = CHAINS[chain_id]
+        delay = WS_RECONNECT_MIN
+        while True:
+            for url in config.ws_endpoints:
+                if url is None:
+                    continue
+                try:
+                    session = await get_global_session()
+                    async with session.ws_connect(url, heartbeat=30) as ws:
+                        await ws.send_json({
+                            "jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]
+                        })
+                        async for msg in ws:
+                            if msg.type != aiohttp.WSMsgType.TEXT:
+                                break
+                            head = msg.json().get("params", {}).get("result")
+                            if not head or "number" not in head:
+                                continue  # Subscription ack or unrelated message
+                            block = int(head["number"], 16)
+                            self._block_numbers[chain_id] = (block, time.monotonic())
+                            self._heads_live.add(chain_id)
+                            delay = WS_RECONNECT_MIN
+                            on_block(block)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.debug(f"newHeads stream for {config.name} dropped ({url}): {e}")
+                finally:
+                    # Fall back to polling until a stream is delivering again
+                    self._heads_live.discard(chain_id)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WS_RECONNECT_MAX)
+    
+    async def prewarm(self):
+        """
+        Open a connection (TCP + TLS) to every configured endpoint with a cheap eth_chainId,
+        so the first scan doesn't pay the handshakes. The round trips also seed the latency
+        ranking and the provider's cached chain id. Failures just count against the endpoint.
+        """
+        tasks = {
+            asyncio.create_task(self._call_endpoint(chain_id, url, "chain_id", (), {}))
+            for chain_id, health in self._endpoint_health.items()
+            for url in health
+        }
+        for task in tasks:
+            task.add_done_callback(self._finish_warmup)
+        self._warmup_tasks |= tasks
+        # Best-effort: slow or blackholed endpoints finish in the background instead of holding up startup
+        if tasks:
+            await asyncio.wait(tasks, timeout=PREWARM_TIMEOUT)
+    
+    def _finish_warmup(self, task: asyncio.Task):
+        self._warmup_tasks.discard(task)
+        if not task.cancelled():
+            task.exception()  # Already recorded against the endpoint; mark retrieved
+    
     async def close(self):
         """Close all Web3 providers"""
+        for task in list(self._warmup_tasks):
+            task.cancel()
+        
+        for task in self._head_tasks.values():
+            task.cancel()
+        self._head_tasks.clear()
+        
         for chain_id in self._web3_instances:
             for url in self._web3_instances[chain_id]:
                 w3 = self._web3_instances[chain_id][url]
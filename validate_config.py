@@ -11,6 +11,7 @@ from config.chains import CHAINS, ChainId
 from config.tokens import ALL_TOKENS, TRADING_PAIRS, Token
 from exchanges.dex.uniswap_v2 import create_dex_instances as create_v2
 from exchanges.dex.uniswap_v3 import create_v3_instances as create_v3
+from utils.addresses import ADDRESS_RE
 
 def validate_chains():
     print("Checking Chains...")
@@ -33,12 +34,17 @@ def validate_tokens():
         dupes = [item for item, count in Counter(symbols).items() if count > 1]
         print(f"❌ Duplicate token symbols: {dupes}")
         
+    # Check addresses validity
+    bad = [
+        (token.symbol, chain_id, addr)
+        for token in ALL_TOKENS
+        for chain_id, addr in token.addresses.items()
+        if not ADDRESS_RE.match(addr)
+    ]
+    for symbol, chain_id, addr in bad:
+        print(f"❌ Invalid address for {symbol} on {chain_id}: {addr}")
+    
     for token in ALL_TOKENS:
-        # Check addresses validity
-        for chain_id, addr in token.addresses.items():
-            if not addr.startswith("0x") or len(addr) != 42:
-                print(f"❌ Invalid address for {token.symbol} on {chain_id}: {addr}")
-                
         # Check chain_decimals validity
         for chain_id, dec in token.chain_decimals.items():
             if not isinstance(dec, int):